@@ -19,19 +19,70 @@ Author: Generated for Personal Capital to Monarch migration
 Version: 1.0
 """
 
+import concurrent.futures
+import contextlib
 import csv
+import functools
+import hashlib
+import io
+import itertools
+import json
 import os
-import glob
+import stat
+import sys
+import tempfile
 import argparse
 import yaml
+from collections import Counter
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, TextIO, Tuple, Optional, Union
+
+# Use the LibYAML-backed loader when PyYAML was built with it (much faster to parse);
+# otherwise fall back to the pure-Python loader, which yaml.safe_load would use
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+
+# Monarch requires these exact column names in this exact order
+MONARCH_HEADERS = (
+    'Date', 'Merchant', 'Category', 'Account',
+    'Original Statement', 'Notes', 'Amount', 'Tags'
+)
+
+# Header row exactly as csv.writer would emit it (no field needs quoting)
+MONARCH_HEADER_LINE = ','.join(MONARCH_HEADERS) + '\r\n'
+
+# Personal Capital columns consumed by the conversion pipeline, in the order
+# their positional indices are resolved by resolve_pc_columns()
+PC_COLUMNS = ('Date', 'Description', 'Category', 'Action', 'Amount', 'Tags')
+
+# Buffer size for reading and writing CSV files; large exports move in fewer, larger syscalls
+IO_BUFFER_SIZE = 1 << 20
+
+# Parsed configuration files: resolved path -> ((st_mtime_ns, st_size), config)
+_CONFIG_CACHE: Dict[Path, Tuple[Tuple[int, int], Dict]] = {}
+
+# Category mappings per config_path argument: config_path -> (config, mappings)
+_CATEGORY_MAPPINGS_CACHE: Dict[Optional[str], Tuple[Dict, Dict[str, str]]] = {}
+
+# Rows transformed per batch while streaming a file; bounds conversion memory
+TRANSFORM_BATCH_SIZE = 4096
 
 
 def load_configuration(config_path: Optional[str] = None) -> Dict:
     """
     Load configuration from YAML file.
     
+    Parsed configurations are cached per resolved path and reused for as long as
+    the file's modification time and size are unchanged, so a batch run parses
+    config.yaml once. The returned dictionary is shared and must not be modified.
+    Across runs, the parsed result is also kept in a JSON sidecar next to the YAML
+    file (see read_config_sidecar), so an unchanged config.yaml is not re-parsed;
+    the sidecar is matched on the file's contents, not its timestamp.
+    
     Args:
         config_path (Optional[str]): Path to configuration file. If None, uses default 'config.yaml'
         
@@ -48,25 +99,125 @@ def load_configuration(config_path: Optional[str] = None) -> Dict:
     else:
         config_path = Path(config_path)
     
-    if not config_path.exists():
+    try:
+        config_path = config_path.resolve()
+        config_stat = config_path.stat()
+    except FileNotFoundError:
         raise FileNotFoundError(
             f"Configuration file not found: {config_path}\n"
             f"Please ensure config.yaml exists or specify a custom config file path."
         )
     
+    # Reuse the parsed configuration if the file hasn't changed since it was loaded
+    file_signature = (config_stat.st_mtime_ns, config_stat.st_size)
+    cached = _CONFIG_CACHE.get(config_path)
+    if cached is not None and cached[0] == file_signature:
+        return cached[1]
+    
+    # Next best: the JSON sidecar written by a previous run from these exact bytes.
+    # Hashing the small YAML file costs far less than parsing it, and unlike the
+    # file's mtime and size it also catches same-size edits that kept the mtime
+    # (coarse timestamps, cp -p, a checkout restoring the mtime).
+    with open(config_path, 'rb') as f:
+        yaml_bytes = f.read()
+    source_digest = hashlib.sha256(yaml_bytes).hexdigest()
+    config = read_config_sidecar(config_path, source_digest)
+    if config is not None:
+        _CONFIG_CACHE[config_path] = (file_signature, config)
+        return config
+    
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-            
+        config = yaml.load(yaml_bytes.decode('utf-8'), Loader=YamlLoader)
+        
         if not config:
             raise ValueError("Configuration file is empty")
-            
+        
+        write_config_sidecar(config_path, source_digest, config)
+        _CONFIG_CACHE[config_path] = (file_signature, config)
         return config
         
     except yaml.YAMLError as e:
         raise yaml.YAMLError(f"Error parsing configuration file {config_path}: {e}")
 
 
+def config_sidecar_path(config_path: Path) -> Path:
+    """
+    Get the path of the JSON sidecar cache for a YAML configuration file.
+    
+    Args:
+        config_path (Path): Path to the YAML configuration file
+        
+    Returns:
+        Path: Sidecar path, e.g. config.yaml -> config.yaml.json
+    """
+    return config_path.with_name(config_path.name + '.json')
+
+
+def read_config_sidecar(config_path: Path, source_digest: str) -> Optional[Dict]:
+    """
+    Read the parsed configuration from its JSON sidecar if it is still current.
+    
+    JSON parses far faster than YAML. The sidecar records the SHA-256 digest of
+    the YAML file it was generated from, and is only used when that still
+    matches the YAML file on disk.
+    
+    Args:
+        config_path (Path): Path to the YAML configuration file
+        source_digest (str): SHA-256 hex digest of config_path's current contents
+        
+    Returns:
+        Optional[Dict]: The cached configuration, or None if there is no usable sidecar
+    """
+    try:
+        with open(config_sidecar_path(config_path), 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if not isinstance(sidecar, dict) or sidecar.get('source') != source_digest:
+        return None
+    return sidecar.get('config') or None
+
+
+def write_config_sidecar(config_path: Path, source_digest: str, config: Dict) -> None:
+    """
+    Best-effort write of the parsed configuration to its JSON sidecar.
+    
+    Nothing is written if the configuration does not survive a JSON round trip
+    unchanged (e.g. non-string keys or dates in custom sections). Failures such as a
+    read-only directory are ignored; the YAML file is simply parsed next time.
+    The file is written to a temporary name and renamed into place, so concurrent
+    readers never see a partial sidecar; it gets the YAML file's permissions.
+    
+    Args:
+        config_path (Path): Path to the YAML configuration file
+        source_digest (str): SHA-256 hex digest of the parsed YAML file's contents
+        config (Dict): Parsed configuration
+    """
+    try:
+        payload = json.dumps({'source': source_digest, 'config': config}, ensure_ascii=False)
+        if json.loads(payload)['config'] != config:
+            return
+    except (TypeError, ValueError):
+        return
+    
+    sidecar_path = config_sidecar_path(config_path)
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=sidecar_path.parent,
+                                         prefix=sidecar_path.name, suffix='.tmp',
+                                         delete=False) as f:
+            temp_path = f.name
+            f.write(payload)
+        # NamedTemporaryFile creates the file owner-only (0600)
+        os.chmod(temp_path, stat.S_IMODE(os.stat(config_path).st_mode))
+        os.replace(temp_path, sidecar_path)
+    except OSError:
+        if temp_path is not None:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+
+
 def validate_configuration(config: Dict) -> None:
     """
     Validate the structure and content of the configuration dictionary.
@@ -112,6 +263,11 @@ def get_category_mappings(config_path: Optional[str] = None) -> Dict[str, str]:
     users to customize how Personal Capital categories are mapped to Monarch Money
     categories without modifying the script code.
     
+    The result is memoized per config_path and rebuilt only when
+    load_configuration returns a different (re-parsed) configuration, so
+    validation and case folding run once per configuration file version. The
+    returned dictionary is shared between callers and must not be modified.
+    
     Args:
         config_path (Optional[str]): Path to custom configuration file. If None, uses 'config.yaml'
         
@@ -131,6 +287,12 @@ def get_category_mappings(config_path: Optional[str] = None) -> Dict[str, str]:
     try:
         # Load and validate configuration
         config = load_configuration(config_path)
+        
+        # Same configuration object as last time: the file is unchanged
+        cached = _CATEGORY_MAPPINGS_CACHE.get(config_path)
+        if cached is not None and cached[0] is config:
+            return cached[1]
+        
         validate_configuration(config)
         
         # Extract category mappings
@@ -142,8 +304,9 @@ def get_category_mappings(config_path: Optional[str] = None) -> Dict[str, str]:
             case_insensitive_mappings = {}
             for pc_category, monarch_category in category_mappings.items():
                 case_insensitive_mappings[pc_category.lower()] = monarch_category
-            return case_insensitive_mappings
+            category_mappings = case_insensitive_mappings
         
+        _CATEGORY_MAPPINGS_CACHE[config_path] = (config, category_mappings)
         return category_mappings
         
     except (FileNotFoundError, ValueError, yaml.YAMLError) as e:
@@ -229,22 +392,27 @@ def detect_pc_format(headers: List[str]) -> str:
         ['Date', 'Description', 'Action', 'Quantity', 'Price', 'Amount'] -> 'format1'
         ['Date', 'Description', 'Category', 'Tags', 'Amount'] -> 'format2'
     """
-    # Check for the presence of investment-specific columns
-    investment_columns = {'Action', 'Quantity', 'Price'}
-    header_set = set(headers)
-    
-    if investment_columns.issubset(header_set):
+    return _detect_pc_format(tuple(headers))
+
+
+@functools.lru_cache(maxsize=32)
+def _detect_pc_format(headers: Tuple[str, ...]) -> str:
+    """Detect the format of a header tuple; exports of one account share headers."""
+    # Check for the presence of investment-specific columns. For a handful of
+    # headers, direct membership tests beat building a set.
+    if 'Action' in headers and 'Quantity' in headers and 'Price' in headers:
         return 'format1'
     else:
         return 'format2'
 
 
-def read_pc_transactions(input_file: str) -> Tuple[List[Dict], str]:
+def read_pc_transactions(input_file: Union[str, os.PathLike, TextIO]) -> Tuple[List[Dict], str]:
     """
     Read and parse Personal Capital CSV file, detecting the format automatically.
     
     Args:
-        input_file (str): Path to the input Personal Capital CSV file
+        input_file (Union[str, os.PathLike, TextIO]): Path to the input Personal Capital
+            CSV file, or an already open text stream (opened with newline='')
         
     Returns:
         Tuple[List[Dict], str]: (list of transaction dictionaries, detected format)
@@ -254,27 +422,163 @@ def read_pc_transactions(input_file: str) -> Tuple[List[Dict], str]:
         csv.Error: If the CSV file is malformed
         UnicodeDecodeError: If the file encoding is not UTF-8
     """
-    transactions = []
+    if isinstance(input_file, (str, os.PathLike)):
+        try:
+            with open(input_file, 'r', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as infile:
+                advise_sequential_read(infile)
+                return read_pc_transactions(infile)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Input file not found: {input_file}")
+        except UnicodeDecodeError as e:
+            raise UnicodeDecodeError(f"File encoding error in {input_file}: {e}")
     
-    try:
-        with open(input_file, 'r', encoding='utf-8') as infile:
-            reader = csv.DictReader(infile)
-            
-            # Detect the Personal Capital format based on headers
-            pc_format = detect_pc_format(reader.fieldnames or [])
-            
-            # Read all transactions into memory
-            for row in reader:
-                transactions.append(row)
-                
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Input file not found: {input_file}")
-    except UnicodeDecodeError as e:
-        raise UnicodeDecodeError(f"File encoding error in {input_file}: {e}")
+    reader = csv.DictReader(input_file, dialect='excel')
+    
+    # Detect the Personal Capital format based on headers
+    pc_format = detect_pc_format(reader.fieldnames or [])
+    
+    # Read all transactions into memory
+    transactions = list(reader)
     
     return transactions, pc_format
 
 
+def advise_sequential_read(infile) -> None:
+    """
+    Tell the kernel an input file will be read front to back.
+    
+    POSIX_FADV_SEQUENTIAL widens the kernel's read-ahead window, so the next
+    blocks are prefetched while the CSV parser is busy. This is only a hint: it is
+    skipped on platforms without posix_fadvise (Windows, macOS) and for objects
+    that are not backed by a file descriptor.
+    
+    Args:
+        infile: Open file object to advise on
+    """
+    if hasattr(os, 'posix_fadvise'):
+        with contextlib.suppress(OSError):
+            os.posix_fadvise(infile.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+
+def iter_pc_rows(reader: Iterable[List[str]], width: int) -> Iterator[List[str]]:
+    """
+    Yield the data rows of a Personal Capital CSV as normalized positional rows.
+    
+    Blank lines are skipped, matching csv.DictReader. Every row is normalized to
+    exactly width + 1 values: short rows are padded, surplus fields are dropped,
+    and a trailing '' stands in for columns missing from the export
+    (see resolve_pc_columns).
+    
+    Args:
+        reader (Iterable[List[str]]): csv.reader positioned after the header row
+        width (int): Number of columns in the header row
+        
+    Yields:
+        List[str]: Normalized data row
+    """
+    for row in reader:
+        if row:
+            # Pad short rows, drop surplus fields, add the trailing '' field
+            row.extend([''] * (width - len(row)))
+            row[width:] = ('',)
+            yield row
+
+
+def resolve_pc_columns(headers: Sequence[str]) -> Tuple[int, ...]:
+    """
+    Resolve the positional index of each column in PC_COLUMNS from a header row.
+    
+    Columns that are absent from the export (e.g. Action in format2, Tags in
+    format1) resolve to len(headers), which is the position of the empty
+    padding field that iter_pc_rows appends to every row.
+    
+    Args:
+        headers (Sequence[str]): Header row of the Personal Capital CSV file
+    
+    Returns:
+        Tuple[int, ...]: Column indices in PC_COLUMNS order
+    """
+    return _resolve_pc_columns(tuple(headers))
+
+
+@functools.lru_cache(maxsize=32)
+def _resolve_pc_columns(headers: Tuple[str, ...]) -> Tuple[int, ...]:
+    """Resolve column indices for a header tuple; a batch of exports usually shares one."""
+    missing = len(headers)
+    # Later columns overwrite earlier ones, so a duplicated header resolves to its
+    # last occurrence, as it does with csv.DictReader
+    positions = {name: index for index, name in enumerate(headers)}
+    return tuple(positions.get(name, missing) for name in PC_COLUMNS)
+
+
+def map_category(category: str, category_mappings: Dict[str, str]) -> str:
+    """
+    Map a Personal Capital category to its Monarch category.
+    
+    Tries an exact match first, then a lowercase match (category_mappings has
+    lowercase keys when case_sensitive_matching is false). Unmapped categories
+    are returned unchanged.
+    
+    Args:
+        category (str): Original Personal Capital category
+        category_mappings (Dict[str, str]): Category mapping dictionary
+    
+    Returns:
+        str: Mapped Monarch category
+    """
+    mapped_category = category_mappings.get(category)
+    if mapped_category is None:
+        mapped_category = category_mappings.get(category.lower(), category)
+    return mapped_category
+
+
+def transform_pc_rows(rows: Iterable[List[str]], columns: Tuple[int, ...],
+                      category_mappings: Dict[str, str],
+                      category_counts: Counter) -> Iterator[Tuple[str, ...]]:
+    """
+    Lazily transform positional Personal Capital rows to Monarch rows.
+    
+    Rows are consumed in batches of TRANSFORM_BATCH_SIZE so memory stays bounded
+    regardless of file size. For each batch, categories are counted in C
+    (Counter.update) and only categories not seen before are resolved through
+    map_category; rows are then transformed against the resolved categories, so
+    each row costs a single exact-key lookup.
+    
+    Args:
+        rows (Iterable[List[str]]): Normalized rows, e.g. from iter_pc_rows
+        columns (Tuple[int, ...]): Column indices from resolve_pc_columns
+        category_mappings (Dict[str, str]): Category mapping dictionary
+        category_counts (Counter): Updated in place with the number of
+                                   transactions per original category
+        
+    Yields:
+        Tuple[str, ...]: Transaction values in MONARCH_HEADERS order
+    """
+    category_of = itemgetter(columns[PC_COLUMNS.index('Category')])
+    # Pulls all PC_COLUMNS fields out of a row in one C call
+    pc_fields_of = itemgetter(*columns)
+    resolved_categories = {}
+    rows = iter(rows)
+    
+    while True:
+        batch = list(itertools.islice(rows, TRANSFORM_BATCH_SIZE))
+        if not batch:
+            return
+        
+        # resolved_categories memoizes map_category for this file; it only needs
+        # topping up when the batch introduced categories not seen before
+        category_counts.update(map(category_of, batch))
+        if len(category_counts) != len(resolved_categories):
+            for category in category_counts:
+                if category not in resolved_categories:
+                    resolved_categories[category] = map_category(category, category_mappings)
+        
+        # Same output as transform_transaction, in MONARCH_HEADERS order
+        for date, description, category, action, amount, tags in map(pc_fields_of, batch):
+            yield (date, description, resolved_categories[category], '',
+                   description, action, amount, tags)
+
+
 def transform_transaction(row: Dict[str, str], category_mappings: Dict[str, str]) -> Dict[str, str]:
     """
     Transform a single Personal Capital transaction to Monarch format.
@@ -302,16 +606,7 @@ def transform_transaction(row: Dict[str, str], category_mappings: Dict[str, str]
     """
     # Get the original category and apply mapping if it exists
     original_category = row.get('Category', '')
-    
-    # Try exact match first, then case-insensitive match if needed
-    mapped_category = category_mappings.get(original_category)
-    if mapped_category is None:
-        # If no exact match, try case-insensitive lookup
-        # This handles when category_mappings has lowercase keys due to case_sensitive_matching: false
-        mapped_category = category_mappings.get(original_category.lower(), original_category)
-    else:
-        # Use the mapped category from exact match
-        pass
+    mapped_category = map_category(original_category, category_mappings)
     
     # Build the Monarch transaction record
     # Note: Monarch expects specific column order and naming
@@ -340,12 +635,39 @@ def track_category_remapping(original_category: str, mapped_category: str, remap
     """
     # Only track if a remapping actually occurred
     if mapped_category != original_category:
-        if original_category not in remapping_counts:
-            remapping_counts[original_category] = {
+        # One lookup on the common path (category already seen) instead of three
+        entry = remapping_counts.get(original_category)
+        if entry is None:
+            entry = remapping_counts[original_category] = {
                 'mapped_to': mapped_category, 
                 'count': 0
             }
-        remapping_counts[original_category]['count'] += 1
+        entry['count'] += 1
+
+
+def summarize_category_remapping(category_counts: Counter, category_mappings: Dict[str, str]) -> Dict:
+    """
+    Build category remapping statistics from per-category transaction counts.
+    
+    This is the bulk counterpart of track_category_remapping: categories are
+    counted with a Counter while rows stream past, and the statistics are
+    derived once per distinct category afterwards instead of once per row.
+    
+    Args:
+        category_counts (Counter): Number of transactions per original PC category
+        category_mappings (Dict[str, str]): Category mapping dictionary
+        
+    Returns:
+        Dict: Remapping statistics in the same shape track_category_remapping builds,
+              {original_category: {'mapped_to': mapped_category, 'count': count}}
+    """
+    remapping_counts = {}
+    for original_category, count in category_counts.items():
+        mapped_category = map_category(original_category, category_mappings)
+        # Only report categories that were actually remapped
+        if mapped_category != original_category:
+            remapping_counts[original_category] = {'mapped_to': mapped_category, 'count': count}
+    return remapping_counts
 
 
 def write_monarch_csv(transactions: List[Dict[str, str]], output_file: str) -> None:
@@ -362,36 +684,128 @@ def write_monarch_csv(transactions: List[Dict[str, str]], output_file: str) -> N
     Raises:
         IOError: If unable to write to the output file
     """
-    # Monarch requires these exact column names in this exact order
-    monarch_headers = [
-        'Date', 'Merchant', 'Category', 'Account', 
-        'Original Statement', 'Notes', 'Amount', 'Tags'
-    ]
+    write_monarch_rows(monarch_rows(transactions), output_file)
+
+
+def write_monarch_csv_to_stream(transactions: Iterable[Dict[str, str]], stream: TextIO) -> None:
+    """
+    Write transformed transactions as Monarch CSV to an open text stream.
+    
+    Same output as write_monarch_csv, for callers that already hold a file
+    object or an in-memory buffer such as io.StringIO. File streams should be
+    opened with newline='' so the CSV line endings are written unchanged.
+    
+    Args:
+        transactions (Iterable[Dict[str, str]]): Transactions in Monarch format
+        stream (TextIO): Writable text stream
+    """
+    write_monarch_rows_to_stream(monarch_rows(transactions), stream)
+
+
+def monarch_rows(transactions: Iterable[Dict[str, str]]) -> Iterator[List[str]]:
+    """
+    Lazily convert Monarch transaction dictionaries to positional rows.
     
+    Args:
+        transactions (Iterable[Dict[str, str]]): Transactions in Monarch format
+        
+    Yields:
+        List[str]: Transaction values in MONARCH_HEADERS order, '' for missing columns
+    """
+    return ([transaction.get(header, '') for header in MONARCH_HEADERS]
+            for transaction in transactions)
+
+
+def write_monarch_rows(rows: Iterable[Sequence[str]], output_file: str) -> None:
+    """
+    Write positional Monarch rows (values in MONARCH_HEADERS order) to a CSV file.
+    
+    Args:
+        rows (Iterable[Sequence[str]]): Transaction rows in MONARCH_HEADERS order
+        output_file (str): Path where the output CSV file should be written
+        
+    Raises:
+        IOError: If unable to write to the output file
+    """
     try:
-        with open(output_file, 'w', newline='', encoding='utf-8') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=monarch_headers)
-            writer.writeheader()
-            writer.writerows(transactions)
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE) as outfile:
+            write_monarch_rows_to_stream(rows, outfile)
     except IOError as e:
         raise IOError(f"Unable to write output file {output_file}: {e}")
 
 
-def convert_pc_to_monarch(input_file: str, output_file: str, config_path: Optional[str] = None) -> Tuple[int, Dict]:
+def write_monarch_rows_to_stream(rows: Iterable[Sequence[str]], stream: TextIO) -> None:
+    """
+    Write the Monarch header and positional rows to an open text stream.
+    
+    Args:
+        rows (Iterable[Sequence[str]]): Transaction rows in MONARCH_HEADERS order
+        stream (TextIO): Writable text stream, opened with newline='' if it is a file
+    """
+    stream.write(MONARCH_HEADER_LINE)
+    csv.writer(stream).writerows(rows)
+
+
+class _OutputFileIO(io.FileIO):
+    """Raw output file that reports failed writes against the final output path."""
+    
+    def __init__(self, path: str, output_file: str):
+        self.output_file = output_file
+        super().__init__(path, 'w')
+    
+    def write(self, data) -> int:
+        try:
+            return super().write(data)
+        except OSError as e:
+            raise IOError(f"Unable to write output file {self.output_file}: {e}")
+
+
+def open_output_file(path: str, output_file: str) -> TextIO:
+    """
+    Open a Monarch CSV file for writing, reporting failures as output errors.
+    
+    Equivalent to open(path, 'w', newline='', encoding='utf-8',
+    buffering=IO_BUFFER_SIZE), except that failing to create or write the file
+    raises IOError("Unable to write output file <output_file>: ..."). Errors are
+    translated in the raw file layer, which is only called once per full buffer,
+    so the per-row write path is unchanged.
+    
+    Args:
+        path (str): Path of the file to create, e.g. a temporary name for output_file
+        output_file (str): Output path to name in error messages
+    
+    Returns:
+        TextIO: Writable text stream
+    
+    Raises:
+        IOError: If unable to create or write the output file
+    """
+    try:
+        raw = _OutputFileIO(path, output_file)
+    except OSError as e:
+        raise IOError(f"Unable to write output file {output_file}: {e}")
+    return io.TextIOWrapper(io.BufferedWriter(raw, IO_BUFFER_SIZE), encoding='utf-8', newline='')
+
+
+def convert_pc_to_monarch(input_file: str, output_file: str, config_path: Optional[str] = None,
+                          category_mappings: Optional[Dict[str, str]] = None) -> Tuple[int, Dict]:
     """
     Convert a Personal Capital CSV file to Monarch Money import format.
     
     This is the main conversion function that orchestrates the entire process:
-    1. Read and parse the Personal Capital CSV file
+    1. Read the Personal Capital CSV header and detect the format
     2. Load category mappings from configuration file
-    3. Transform each transaction to Monarch format
-    4. Track category remapping statistics
-    5. Write the output CSV file
+    3. Stream each transaction through the Monarch transform
+    4. Write each transformed transaction to the output CSV file as it is produced
+    5. Derive category remapping statistics
     
     Args:
         input_file (str): Path to input Personal Capital CSV file
         output_file (str): Path where Monarch CSV should be written
         config_path (Optional[str]): Path to custom configuration file
+        category_mappings (Optional[Dict[str, str]]): Preloaded category mappings.
+            When converting a batch, load them once with get_category_mappings and
+            pass them here; config_path is then ignored.
     
     Returns:
         Tuple[int, Dict]: (number of transactions processed, remapping statistics)
@@ -401,37 +815,146 @@ def convert_pc_to_monarch(input_file: str, output_file: str, config_path: Option
         IOError: If unable to write output file
         csv.Error: If CSV parsing fails
     """
-    # Step 1: Read the Personal Capital transactions
-    pc_transactions, pc_format = read_pc_transactions(input_file)
-    print(f"Detected {pc_format} for {os.path.basename(input_file)}")
+    # Step 1: Open the Personal Capital file
+    try:
+        infile = open(input_file, 'r', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Input file not found: {input_file}")
     
-    # Step 2: Get category mappings from configuration file
-    category_mappings = get_category_mappings(config_path)
+    # The output is written under a temporary name and renamed into place once
+    # complete, so a failed conversion never truncates or removes the output of
+    # an earlier run, and no partial file is left that could be imported by mistake
+    temp_file = output_file + '.tmp'
+    with infile:
+        advise_sequential_read(infile)
+        try:
+            # Only output errors are reported as such; errors reading the input
+            # propagate from the stream core unchanged
+            with open_output_file(temp_file, output_file) as outfile:
+                # Steps 2-5 run on the open streams
+                result = convert_pc_to_monarch_streams(
+                    infile, outfile, config_path, category_mappings,
+                    source_name=os.path.basename(input_file))
+            try:
+                os.replace(temp_file, output_file)
+            except OSError as e:
+                raise IOError(f"Unable to write output file {output_file}: {e}")
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.remove(temp_file)
+            raise
     
-    # Step 3: Transform each transaction and track remapping statistics
-    monarch_transactions = []
-    remapping_counts = {}
+    return result
+
+
+def convert_pc_to_monarch_streams(infile: TextIO, outfile: TextIO, config_path: Optional[str] = None,
+                                  category_mappings: Optional[Dict[str, str]] = None,
+                                  source_name: str = '<stream>') -> Tuple[int, Dict]:
+    """
+    Convert Personal Capital CSV text from one stream to Monarch CSV in another.
     
-    for row in pc_transactions:
-        # Transform the transaction to Monarch format
-        monarch_row = transform_transaction(row, category_mappings)
-        monarch_transactions.append(monarch_row)
+    This is the core of convert_pc_to_monarch, for callers that already hold open
+    streams, e.g. io.StringIO buffers. File streams should be opened with
+    newline=''.
+    
+    Args:
+        infile (TextIO): Readable stream positioned at the Personal Capital CSV header
+        outfile (TextIO): Writable stream for the Monarch CSV
+        config_path (Optional[str]): Path to custom configuration file
+        category_mappings (Optional[Dict[str, str]]): Preloaded category mappings;
+            config_path is then ignored
+        source_name (str): Name of the input shown in the format detection message
+    
+    Returns:
+        Tuple[int, Dict]: (number of transactions processed, remapping statistics)
         
-        # Track category remapping for user feedback
-        original_category = row.get('Category', '')
-        mapped_category = monarch_row['Category']
-        track_category_remapping(original_category, mapped_category, remapping_counts)
+    Raises:
+        csv.Error: If CSV parsing fails
+    """
+    # Step 1: Detect the format from the header
+    reader = csv.reader(infile, dialect='excel')
+    headers = next(reader, [])
+    pc_format = detect_pc_format(headers)
+    print(f"Detected {pc_format} for {source_name}")
+    columns = resolve_pc_columns(headers)
+    
+    # Step 2: Get category mappings from configuration file unless preloaded
+    if category_mappings is None:
+        category_mappings = get_category_mappings(config_path)
     
-    # Step 4: Write the Monarch CSV file
-    write_monarch_csv(monarch_transactions, output_file)
+    # Steps 3-4: Stream rows from the reader through the transform into the writer
+    # Nothing is materialized per file; memory is bounded by TRANSFORM_BATCH_SIZE
+    category_counts = Counter()
+    rows = transform_pc_rows(
+        iter_pc_rows(reader, len(headers)), columns, category_mappings, category_counts)
+    write_monarch_rows_to_stream(rows, outfile)
     
-    return len(monarch_transactions), remapping_counts
+    # Step 5: Derive remapping statistics, O(unique categories)
+    remapping_counts = summarize_category_remapping(category_counts, category_mappings)
+    
+    return sum(category_counts.values()), remapping_counts
 
 
-def parse_arguments() -> argparse.Namespace:
+def convert_file(input_file: str, output_file: str, category_mappings: Dict[str, str]) -> Tuple[int, Dict, str]:
+    """
+    Convert one file in a worker process, capturing its console output.
+    
+    This wraps convert_pc_to_monarch for use with a process pool: anything the
+    conversion prints is returned instead of written, so the parent process can
+    print it in order without interleaving output from concurrent workers.
+    
+    Args:
+        input_file (str): Path to input Personal Capital CSV file
+        output_file (str): Path where Monarch CSV should be written
+        category_mappings (Dict[str, str]): Category mappings loaded once by the parent
+    
+    Returns:
+        Tuple[int, Dict, str]: (number of transactions processed, remapping statistics,
+                                captured console output)
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        transaction_count, remapping_counts = convert_pc_to_monarch(
+            input_file, output_file, category_mappings=category_mappings)
+    return transaction_count, remapping_counts, output.getvalue()
+
+
+def submit_conversion(executor: Optional[concurrent.futures.Executor], input_file: str,
+                      output_file: str, category_mappings: Dict[str, str]) -> concurrent.futures.Future:
+    """
+    Schedule convert_file on an executor, or run it immediately without one.
+    
+    Both paths return a Future, so callers collect results (and exceptions) the
+    same way whether or not a process pool is in use.
+    
+    Args:
+        executor (Optional[concurrent.futures.Executor]): Pool to submit to, or None
+                                                           to convert in this process
+        input_file (str): Path to input Personal Capital CSV file
+        output_file (str): Path where Monarch CSV should be written
+        category_mappings (Dict[str, str]): Category mappings loaded once by the parent
+    
+    Returns:
+        concurrent.futures.Future: Resolves to convert_file's return value
+    """
+    if executor is not None:
+        return executor.submit(convert_file, input_file, output_file, category_mappings)
+    
+    future = concurrent.futures.Future()
+    try:
+        future.set_result(convert_file(input_file, output_file, category_mappings))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def parse_arguments(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     """
     Parse command-line arguments.
     
+    Args:
+        argv (Optional[Sequence[str]]): Arguments to parse; defaults to sys.argv[1:]
+    
     Returns:
         argparse.Namespace: Parsed command-line arguments
     """
@@ -483,18 +1006,38 @@ For more information, see the README.md file.
         version='Personal Capital to Monarch Migration Script v2.0'
     )
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
-def main() -> None:
+class MigrationResult(NamedTuple):
+    """
+    Outcome of a main() run, for callers that need more than the printed report.
+    
+    Attributes:
+        error (Optional[str]): Why the run stopped before converting anything, or None
+        files_found (int): Number of Personal Capital CSV files discovered
+        files_processed (int): Number of files converted successfully
+        transactions (int): Total transactions converted across all files
+        output_paths (Tuple[Path, ...]): Monarch CSV files written, in input order
+    """
+    error: Optional[str] = None
+    files_found: int = 0
+    files_processed: int = 0
+    transactions: int = 0
+    output_paths: Tuple[Path, ...] = ()
+
+
+def main(input_dir: Optional[Path] = None, output_dir: Optional[Path] = None,
+         config_path: Optional[str] = None, argv: Optional[Sequence[str]] = None) -> MigrationResult:
     """
     Main function to process all Personal Capital CSV files in the specified input folder.
     
     This function orchestrates the entire batch conversion process:
-    1. Parses command-line arguments (including custom directories and config file path)
+    1. Parses command-line arguments (including custom directories and config file path),
+       unless both directories are passed in directly
     2. Validates input/output directory structure
     3. Discovers Personal Capital CSV files to convert
-    4. Processes each file through the conversion pipeline
+    4. Processes the files through the conversion pipeline in parallel worker processes
     5. Provides detailed progress feedback and statistics
     6. Generates summary report of all conversions and category remappings
     
@@ -508,20 +1051,38 @@ def main() -> None:
         
     The function skips files that already have '-monarch.csv' suffix to avoid
     re-processing already converted files.
+    
+    Args:
+        input_dir (Optional[Path]): Input directory; overrides --input-dir when given
+        output_dir (Optional[Path]): Output directory; overrides --output-dir when given
+        config_path (Optional[str]): Configuration file; overrides --config when given
+        argv (Optional[Sequence[str]]): Command-line arguments to parse instead of
+            sys.argv[1:]. They are only parsed when argv is given or a directory
+            is not, so direct calls with both directories never touch sys.argv.
+        
+    Returns:
+        MigrationResult: Structured summary of the run, alongside the printed report
     """
-    # Parse command-line arguments
-    args = parse_arguments()
+    # Parse command-line arguments, preferring explicit arguments over the command line
+    if argv is not None or input_dir is None or output_dir is None:
+        args = parse_arguments(argv)
+        if input_dir is None:
+            input_dir = args.input_dir
+        if output_dir is None:
+            output_dir = args.output_dir
+        if config_path is None:
+            config_path = args.config
     
-    # Define directory paths from command-line arguments
-    input_dir = Path(args.input_dir)
-    output_dir = Path(args.output_dir)
+    # Define directory paths
+    input_dir = Path(input_dir)
+    output_dir = Path(output_dir)
     
     # Step 1: Validate input directory exists
     if not input_dir.exists():
         print(f"❌ Error: Input directory '{input_dir}' not found!")
         print(f"Please create the directory '{input_dir}' and place your Personal Capital CSV files there.")
         print(f"Or use -i flag to specify a different input directory.")
-        return
+        return MigrationResult(error=f"Input directory '{input_dir}' not found")
     
     # Step 2: Create output directory if it doesn't exist
     try:
@@ -530,57 +1091,106 @@ def main() -> None:
         print(f"📁 Output directory: {output_dir.absolute()}")
     except OSError as e:
         print(f"❌ Error creating output directory '{output_dir}': {e}")
-        return
+        return MigrationResult(error=f"Error creating output directory '{output_dir}': {e}")
     
     # Step 3: Discover Personal Capital CSV files to process
-    csv_files = glob.glob(str(input_dir / '*.csv'))
-    pc_files = [f for f in csv_files if not f.endswith('-monarch.csv')]
+    # A single directory scan; DirEntry caches the file type, so no extra stat calls.
+    # Hidden files are skipped (as glob '*.csv' did), and files are sorted by name
+    # so the processing order and report are deterministic.
+    try:
+        with os.scandir(input_dir) as entries:
+            pc_files = sorted(
+                (entry for entry in entries
+                 if entry.name.endswith('.csv')
+                 and not entry.name.endswith('-monarch.csv')
+                 and not entry.name.startswith('.')
+                 and entry.is_file()),
+                key=lambda entry: entry.name
+            )
+    except OSError as e:
+        # e.g. the input path is a file, or the directory is not readable
+        print(f"❌ Error reading input directory '{input_dir}': {e}")
+        return MigrationResult(error=f"Error reading input directory '{input_dir}': {e}")
     
     if not pc_files:
         print(f"⚠️ No Personal Capital CSV files found in '{input_dir}' directory!")
         print(f"Please place your Personal Capital transaction exports (.csv files) in the '{input_dir}' folder.")
         print(f"Or use -i flag to specify a different input directory containing your CSV files.")
-        return
+        return MigrationResult(error=f"No Personal Capital CSV files found in '{input_dir}'")
     
     # Step 4: Process each file and track overall statistics
     print(f"🔍 Found {len(pc_files)} Personal Capital CSV file(s) to convert:")
     
+    # Load category mappings once for the whole batch; workers receive them
+    # with each task instead of re-reading the configuration file
+    category_mappings = get_category_mappings(config_path)
+    
     total_transactions = 0  # Track total transactions across all files
-    all_remappings = {}     # Accumulate category remapping statistics
+    all_remapping_counts = Counter()  # Accumulate category remapping statistics
+    all_remapping_targets = {}        # Original category -> mapped Monarch category
     successful_conversions = 0
+    output_paths = []                 # Output files written, in input order
     
-    for input_file in pc_files:
-        # Generate output filename with -monarch suffix in output directory
-        input_path = Path(input_file)
-        output_filename = input_path.stem + '-monarch.csv'
-        output_file = output_dir / output_filename
+    # Files are independent, so convert them in parallel worker processes.
+    # Results are consumed in input order while the pool is still running, and
+    # all progress output is printed here in the parent, so the report reads the
+    # same as a sequential run and each file is reported as soon as it and the
+    # files before it are done.
+    # A single file is converted in-process: a pool would only add start-up cost.
+    max_workers = min(len(pc_files), os.cpu_count() or 1)
+    # Paths inside the loop are plain strings; pathlib is only used for setup above
+    output_dir_str = str(output_dir)
+    with contextlib.ExitStack() as stack:
+        executor = None
+        if max_workers > 1:
+            try:
+                executor = stack.enter_context(
+                    concurrent.futures.ProcessPoolExecutor(max_workers=max_workers))
+            except (OSError, NotImplementedError):
+                # No working multiprocessing (e.g. sem_open is unavailable in some
+                # containers and on AWS Lambda); convert the files one by one here
+                executor = None
         
-        print(f"\n📄 Processing: {input_path.name}")
-        print(f"📤 Output: {output_filename}")
+        conversions = []
+        for entry in pc_files:
+            # Generate output filename with -monarch suffix in output directory
+            # (every discovered name ends in '.csv', so a slice replaces splitext)
+            output_filename = entry.name[:-len('.csv')] + '-monarch.csv'
+            output_file = os.path.join(output_dir_str, output_filename)
+            
+            future = submit_conversion(executor, entry.path, output_file, category_mappings)
+            conversions.append((entry.name, output_filename, output_file, future))
         
-        try:
-            # Convert the Personal Capital file to Monarch format
-            transaction_count, remapping_counts = convert_pc_to_monarch(str(input_file), str(output_file), args.config)
+        for input_name, output_filename, output_file, future in conversions:
+            # Each file's progress report is assembled here and written in one call
+            report = [
+                f"\n📄 Processing: {input_name}\n",
+                f"📤 Output: {output_filename}\n",
+            ]
             
-            # Track success metrics
-            total_transactions += transaction_count
-            successful_conversions += 1
-            print(f"✅ Converted {transaction_count} transactions successfully")
+            try:
+                # Collect the converted Personal Capital file from its worker
+                transaction_count, remapping_counts, conversion_output = future.result()
+                report.append(conversion_output)
+                
+                # Track success metrics
+                total_transactions += transaction_count
+                successful_conversions += 1
+                output_paths.append(Path(output_file))
+                report.append(f"✅ Converted {transaction_count} transactions successfully\n")
+                
+                # Accumulate remapping statistics across all files
+                # This helps users understand what category changes were made
+                for original_category, mapping_info in remapping_counts.items():
+                    all_remapping_counts[original_category] += mapping_info['count']
+                    all_remapping_targets[original_category] = mapping_info['mapped_to']
             
-            # Accumulate remapping statistics across all files
-            # This helps users understand what category changes were made
-            for original_category, mapping_info in remapping_counts.items():
-                if original_category not in all_remappings:
-                    all_remappings[original_category] = {
-                        'mapped_to': mapping_info['mapped_to'], 
-                        'count': 0
-                    }
-                all_remappings[original_category]['count'] += mapping_info['count']
+            except Exception as e:
+                # Log errors but continue processing other files
+                report.append(f"❌ Error processing {input_name}: {str(e)}\n")
+                report.append(f"   Skipping this file and continuing with others...\n")
             
-        except Exception as e:
-            # Log errors but continue processing other files
-            print(f"❌ Error processing {input_path.name}: {str(e)}")
-            print(f"   Skipping this file and continuing with others...")
+            sys.stdout.write(''.join(report))
     
     # Step 5: Display comprehensive summary report
     print(f"\n🎉 Migration complete!")
@@ -590,20 +1200,13 @@ def main() -> None:
     print(f"  • Output files saved in: {output_dir.absolute()}")
     
     # Display category remapping summary if any occurred
-    if all_remappings:
+    if all_remapping_counts:
         print(f"\n📋 Category Remapping Summary:")
         print(f"The following Personal Capital categories were automatically mapped to Monarch categories:")
         
         # Sort by count (most frequent first) for better readability
-        sorted_remappings = sorted(
-            all_remappings.items(), 
-            key=lambda x: x[1]['count'], 
-            reverse=True
-        )
-        
-        for original_category, mapping_info in sorted_remappings:
-            count = mapping_info['count']
-            mapped_to = mapping_info['mapped_to']
+        for original_category, count in all_remapping_counts.most_common():
+            mapped_to = all_remapping_targets[original_category]
             print(f"  • {count:,} transactions: '{original_category}' → '{mapped_to}'")
     
     # Step 6: Provide next steps guidance
@@ -614,8 +1217,15 @@ def main() -> None:
     print(f"4. Select the corresponding *-monarch.csv file for each account")
     print(f"5. Assign the correct account name during import (Account column is left empty)")
     
-    if all_remappings:
+    if all_remapping_counts:
         print(f"\n💡 Tip: Review the category remappings above and adjust in Monarch if needed.")
+    
+    return MigrationResult(
+        files_found=len(pc_files),
+        files_processed=successful_conversions,
+        transactions=total_transactions,
+        output_paths=tuple(output_paths),
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+"""
+Shared pytest fixtures for the migration script test suite.
+"""
+
+import csv
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+# Add root directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import migrate_pc_to_monarch
+from migrate_pc_to_monarch import convert_pc_to_monarch_streams, get_category_mappings
+
+# Personal Capital sample exports used as test input
+TEST_DATA_INPUT_DIR = Path(__file__).parent / 'test_data' / 'input'
+# Monarch CSV files the sample exports are expected to convert to
+TEST_DATA_EXPECTED_DIR = Path(__file__).parent / 'test_data' / 'expected_output'
+# Default configuration file shipped with the script
+DEFAULT_CONFIG_FILE = Path(__file__).parent.parent / 'config.yaml'
+
+
+def pytest_addoption(parser):
+    parser.addoption("--fast", action="store_true", default=False,
+                     help="skip tests marked slow, for a quick development loop")
+
+
+def pytest_collection_modifyitems(config, items):
+    if not config.getoption("--fast"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow test skipped by --fast")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _no_default_config_sidecar():
+    """
+    Keep the test session from writing config.yaml.json next to the shipped config.yaml.
+    
+    Sidecars for other configuration files (e.g. in tmp_path) are still written,
+    so the sidecar tests exercise the real code.
+    """
+    write_config_sidecar = migrate_pc_to_monarch.write_config_sidecar
+    default_config = DEFAULT_CONFIG_FILE.resolve()
+    
+    def write_unless_default(config_path, source_digest, config):
+        if config_path != default_config:
+            write_config_sidecar(config_path, source_digest, config)
+    
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(migrate_pc_to_monarch, 'write_config_sidecar', write_unless_default)
+        yield
+
+
+@pytest.fixture(scope="session")
+def category_mappings():
+    """Category mappings from the default config.yaml, loaded once per test session."""
+    return get_category_mappings()
+
+
+@pytest.fixture(scope="session")
+def raw_config():
+    """The default config.yaml as parsed by yaml.safe_load, bypassing the script's caching."""
+    with open(DEFAULT_CONFIG_FILE, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+@pytest.fixture(scope="session")
+def input_corpus():
+    """Contents of every test_data/input CSV file by file name, read once per test session."""
+    return {path.name: path.read_bytes() for path in TEST_DATA_INPUT_DIR.glob('*.csv')}
+
+
+@pytest.fixture(scope="session")
+def test_input_bytes(input_corpus):
+    """Return a function that gives a test input file's cached contents, skipping if missing."""
+    def read(name):
+        data = input_corpus.get(name)
+        if data is None:
+            pytest.skip("Test data file not found")
+        return data
+    return read
+
+
+@pytest.fixture(scope="session")
+def add_test_input(test_input_bytes):
+    """
+    Return a function that places a test input file into a directory.
+    
+    The file is hard-linked from tests/test_data/input, which needs no data
+    copying since main() only reads its inputs. If linking fails (e.g. the
+    temp directory is on another filesystem), the cached contents are written
+    instead.
+    """
+    def add(name, directory):
+        destination = directory / name
+        try:
+            os.link(TEST_DATA_INPUT_DIR / name, destination)
+        except OSError:
+            destination.write_bytes(test_input_bytes(name))
+        return destination
+    return add
+
+
+@pytest.fixture(scope="session")
+def sample_conversion(test_input_bytes, category_mappings):
+    """
+    Return a function that converts a test input file once per session.
+    
+    The conversion runs in memory through convert_pc_to_monarch_streams on the
+    cached input contents, so no files are written. The function returns
+    (transaction_count, remapping_counts, rows), where rows are the generated
+    Monarch CSV data rows as lists in MONARCH_HEADERS order (header row
+    dropped). Results are shared between tests and must not be modified.
+    Tests are skipped if the input file is missing.
+    """
+    conversions = {}
+    
+    def convert(name):
+        if name not in conversions:
+            infile = io.StringIO(test_input_bytes(name).decode('utf-8'), newline='')
+            output = io.StringIO()
+            transaction_count, remapping_counts = convert_pc_to_monarch_streams(
+                infile, output, category_mappings=category_mappings, source_name=name)
+            output.seek(0)
+            reader = csv.reader(output)
+            next(reader)
+            rows = list(reader)
+            conversions[name] = (transaction_count, remapping_counts, rows)
+        return conversions[name]
+    return convert
+
+
+@pytest.fixture(scope="session")
+def expected_format2_rows():
+    """Data rows (as lists, header dropped) of the expected sample_format2 conversion, parsed once per session."""
+    expected_file = TEST_DATA_EXPECTED_DIR / 'sample_format2-monarch.csv'
+    if not expected_file.exists():
+        pytest.skip("Test data files not found")
+    with open(expected_file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        next(reader)
+        return list(reader)
+
+
+@pytest.fixture
+def workspace(tmp_path_factory):
+    """
+    Temporary directory for main() with an empty 'input' folder.
+    
+    Tests pass workspace / 'input' and workspace / 'output' to main()
+    explicitly. Each workspace is a numbered directory under the session's
+    base temp directory, which pytest cleans up with its retention policy
+    rather than per test.
+    """
+    workspace_dir = tmp_path_factory.mktemp('workspace')
+    (workspace_dir / 'input').mkdir()
+    return workspace_dir
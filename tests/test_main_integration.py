@@ -7,13 +7,10 @@ management, file discovery, and batch processing.
 """
 
 import pytest
-import os
+import re
 import sys
-import tempfile
-import shutil
 from pathlib import Path
 from unittest.mock import patch
-import io
 
 # Import the main function
 # Add root directory to path for imports
@@ -21,144 +18,167 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from migrate_pc_to_monarch import main
 
+# Report lines printed by a successful conversion with category remapping
+_SUCCESS_MARKERS = re.compile(r"🎉 Migration complete!|✅ Converted|📋 Category Remapping Summary:")
 
+# Sample exports are checked at collection time, so tests without their data
+# are skipped before any workspace is created
+_TEST_DATA_INPUT_DIR = Path(__file__).parent / 'test_data' / 'input'
+_HAS_SAMPLE_FORMAT2 = (_TEST_DATA_INPUT_DIR / 'sample_format2.csv').is_file()
+_HAS_SAMPLE_WITH_TAGS = (_TEST_DATA_INPUT_DIR / 'sample_with_tags.csv').is_file()
+
+# A Personal Capital export with headers but no transactions
+_EMPTY_CSV_BYTES = b"Date,Description,Category,Tags,Amount\n"
+
+
+# Workspace setups for the report-only scenarios below. Each receives the
+# workspace directory, which starts out with an empty 'input' folder.
+
+def _remove_input_directory(workspace):
+    """No 'input' folder at all."""
+    (workspace / 'input').rmdir()
+
+
+def _replace_input_with_file(workspace):
+    """A file where the 'input' folder should be."""
+    (workspace / 'input').rmdir()
+    (workspace / 'input').touch()
+
+
+def _leave_input_empty(workspace):
+    """An 'input' folder with no CSV files."""
+
+
+def _write_header_only_csv(workspace):
+    """A CSV file with no data rows (just headers)."""
+    (workspace / 'input' / 'empty.csv').write_bytes(_EMPTY_CSV_BYTES)
+
+
+def _block_output_directory(workspace):
+    """A file where the output directory should be."""
+    (workspace / 'output').touch()
+
+
+# The session-wide category_mappings fixture loads the default configuration
+# before the first main() call, so no test pays for parsing config.yaml
+@pytest.mark.usefixtures("category_mappings")
 class TestMainIntegration:
     """Test the main function integration."""
     
-    def test_main_with_no_input_directory(self, capsys):
-        """Test main function when input directory doesn't exist."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Change to temp directory where there's no 'input' folder
-            original_cwd = os.getcwd()
-            original_argv = sys.argv[:]
-            try:
-                os.chdir(temp_dir)
-                # Mock sys.argv to avoid interference with pytest arguments
-                sys.argv = ['migrate_pc_to_monarch.py']
-                main()
-                
-                captured = capsys.readouterr()
-                assert "❌ Error: Input directory 'input' not found!" in captured.out
-                assert "Please create the directory 'input'" in captured.out
-                
-            finally:
-                os.chdir(original_cwd)
-                sys.argv = original_argv
+    @pytest.mark.parametrize("setup, expected, error", [
+        (_remove_input_directory, ["❌ Error: Input directory '{input_dir}' not found!",
+                                   "Please create the directory '{input_dir}'"],
+         "Input directory '{input_dir}' not found"),
+        (_replace_input_with_file, ["❌ Error reading input directory '{input_dir}'"],
+         "Error reading input directory '{input_dir}'"),
+        (_leave_input_empty, ["⚠️ No Personal Capital CSV files found"],
+         "No Personal Capital CSV files found"),
+        # Should process successfully but with 0 transactions
+        (_write_header_only_csv, ["✅ Converted 0 transactions successfully",
+                                  "🎉 Migration complete!"],
+         None),
+        # Should handle the OSError gracefully
+        (_block_output_directory, ["❌ Error creating output directory"],
+         "Error creating output directory"),
+    ], ids=['no_input_directory', 'input_path_is_file', 'empty_input_directory',
+            'header_only_csv', 'output_directory_creation_error'])
+    def test_main_reports(self, workspace, capsys, setup, expected, error):
+        """Test the report main function prints for each workspace scenario."""
+        input_dir = workspace / 'input'
+        setup(workspace)
+        
+        result = main(input_dir=input_dir, output_dir=workspace / 'output')
+        
+        captured = capsys.readouterr()
+        for line in expected:
+            assert line.format(input_dir=input_dir) in captured.out
+        
+        if error is None:
+            assert result.error is None
+            assert result.transactions == 0
+        else:
+            assert error.format(input_dir=input_dir) in result.error
+            assert result.files_processed == 0
+    
+    def test_main_ignores_process_command_line(self, workspace, monkeypatch):
+        """Test that a direct call with both directories does not parse sys.argv."""
+        # e.g. a Jupyter kernel's command line, which argparse would reject
+        monkeypatch.setattr(sys, 'argv', ['ipykernel_launcher.py', '-f', 'kernel.json'])
+        
+        result = main(input_dir=workspace / 'input', output_dir=workspace / 'output')
+        
+        assert result.error == f"No Personal Capital CSV files found in '{workspace / 'input'}'"
     
-    def test_main_with_empty_input_directory(self, capsys):
-        """Test main function with empty input directory."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create empty input directory
-            input_dir = Path(temp_dir) / 'input'
-            input_dir.mkdir()
-            
-            original_cwd = os.getcwd()
-            original_argv = sys.argv[:]
-            try:
-                os.chdir(temp_dir)
-                # Mock sys.argv to avoid interference with pytest arguments
-                sys.argv = ['migrate_pc_to_monarch.py']
-                main()
-                
-                captured = capsys.readouterr()
-                assert "⚠️ No Personal Capital CSV files found" in captured.out
-                
-            finally:
-                os.chdir(original_cwd)
-                sys.argv = original_argv
+    def test_main_parses_given_argv(self, workspace):
+        """Test that main() takes its directories from an explicit argv."""
+        input_dir = workspace / 'input'
+        
+        result = main(argv=['-i', str(input_dir), '-o', str(workspace / 'output')])
+        
+        assert result.error == f"No Personal Capital CSV files found in '{input_dir}'"
+        assert (workspace / 'output').is_dir()
     
-    def test_main_with_test_data(self, capsys):
+    @pytest.mark.skipif(not _HAS_SAMPLE_FORMAT2, reason="Test data file not found")
+    def test_main_with_test_data(self, workspace, add_test_input):
         """Test main function with real test data."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create input directory and copy test file
-            input_dir = Path(temp_dir) / 'input'
-            input_dir.mkdir()
-            
-            # Copy one of our test files
-            test_file_src = Path('tests/test_data/input/sample_format2.csv')
-            if test_file_src.exists():
-                shutil.copy(test_file_src, input_dir / 'sample_format2.csv')
-                
-                original_cwd = os.getcwd()
-                original_argv = sys.argv[:]
-                try:
-                    os.chdir(temp_dir)
-                    # Mock sys.argv to avoid interference with pytest arguments
-                    sys.argv = ['migrate_pc_to_monarch.py']
-                    main()
-                    
-                    captured = capsys.readouterr()
-                    assert "🎉 Migration complete!" in captured.out
-                    assert "✅ Converted" in captured.out
-                    assert "📋 Category Remapping Summary:" in captured.out
-                    
-                    # Verify output file was created
-                    output_dir = Path(temp_dir) / 'output'
-                    assert output_dir.exists()
-                    output_files = list(output_dir.glob('*.csv'))
-                    assert len(output_files) == 1
-                    assert 'sample_format2-monarch.csv' in output_files[0].name
-                    
-                finally:
-                    os.chdir(original_cwd)
-                    sys.argv = original_argv
-            else:
-                pytest.skip("Test data file not found")
+        # Place one of our test files in the input directory
+        add_test_input('sample_format2.csv', workspace / 'input')
+        
+        result = main(input_dir=workspace / 'input', output_dir=workspace / 'output')
+        
+        assert result.error is None
+        assert result.files_found == result.files_processed == 1
+        assert result.transactions == 10
+        
+        # Verify output file was created
+        expected_output = workspace / 'output' / 'sample_format2-monarch.csv'
+        assert result.output_paths == (expected_output,)
+        assert expected_output.is_file()
     
-    def test_main_error_handling(self, capsys):
-        """Test main function error handling with file that causes processing error."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create input directory with a file that will cause conversion error
-            input_dir = Path(temp_dir) / 'input'
-            input_dir.mkdir()
-            
-            # Create a CSV file with no data rows (just headers)
-            # This should process successfully but with 0 transactions
-            empty_csv = input_dir / 'empty.csv'
-            with open(empty_csv, 'w') as f:
-                f.write("Date,Description,Category,Tags,Amount\n")
-            
-            original_cwd = os.getcwd()
-            original_argv = sys.argv[:]
-            try:
-                os.chdir(temp_dir)
-                # Mock sys.argv to avoid interference with pytest arguments
-                sys.argv = ['migrate_pc_to_monarch.py']
-                main()
-                
-                captured = capsys.readouterr()
-                # Should process successfully but with 0 transactions
-                assert "✅ Converted 0 transactions successfully" in captured.out
-                assert "🎉 Migration complete!" in captured.out
-                
-            finally:
-                os.chdir(original_cwd)
-                sys.argv = original_argv
+    @pytest.mark.skipif(not (_HAS_SAMPLE_FORMAT2 and _HAS_SAMPLE_WITH_TAGS),
+                        reason="Test data file not found")
+    def test_main_with_multiple_files(self, workspace, add_test_input, capsys):
+        """Test main function converting several files in parallel."""
+        input_dir = workspace / 'input'
+        
+        test_files = ['sample_format2.csv', 'sample_with_tags.csv']
+        for name in test_files:
+            add_test_input(name, input_dir)
+        
+        result = main(input_dir=workspace / 'input', output_dir=workspace / 'output')
+        
+        assert result.files_found == result.files_processed == 2
+        assert result.transactions == 14
+        
+        output_dir = workspace / 'output'
+        assert result.output_paths == tuple(
+            output_dir / name.replace('.csv', '-monarch.csv') for name in test_files)
+        for output_path in result.output_paths:
+            assert output_path.exists()
+        
+        captured = capsys.readouterr()
+        # Scan the report once for all expected markers
+        assert set(_SUCCESS_MARKERS.findall(captured.out)) == {
+            "🎉 Migration complete!", "✅ Converted", "📋 Category Remapping Summary:"
+        }
+        # Worker output is replayed in the parent, once per file
+        assert captured.out.count("Detected format2") == 2
     
-    def test_main_output_directory_creation_error(self):
-        """Test main function when output directory cannot be created."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create input directory
-            input_dir = Path(temp_dir) / 'input'
-            input_dir.mkdir()
-            
-            # Create a file where output directory should be
-            output_path = Path(temp_dir) / 'output'
-            with open(output_path, 'w') as f:
-                f.write("blocking file")
-            
-            original_cwd = os.getcwd()
-            original_argv = sys.argv[:]
-            try:
-                os.chdir(temp_dir)
-                # Mock sys.argv to avoid interference with pytest arguments
-                sys.argv = ['migrate_pc_to_monarch.py']
-                # This should handle the OSError gracefully
-                main()
-                
-            finally:
-                os.chdir(original_cwd)
-                sys.argv = original_argv
+    @pytest.mark.skipif(not (_HAS_SAMPLE_FORMAT2 and _HAS_SAMPLE_WITH_TAGS),
+                        reason="Test data file not found")
+    def test_main_without_process_pool(self, workspace, add_test_input):
+        """Test that main() converts in-process when a worker pool cannot be created."""
+        for name in ['sample_format2.csv', 'sample_with_tags.csv']:
+            add_test_input(name, workspace / 'input')
+        
+        with patch('concurrent.futures.ProcessPoolExecutor',
+                   side_effect=NotImplementedError("sem_open is not available")), \
+             patch('migrate_pc_to_monarch.os.cpu_count', return_value=2):
+            result = main(input_dir=workspace / 'input', output_dir=workspace / 'output')
+        
+        assert result.error is None
+        assert result.files_processed == 2
+        assert result.transactions == 14
 
 
 if __name__ == '__main__':
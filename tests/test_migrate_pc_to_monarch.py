@@ -18,62 +18,166 @@ Coverage: python -m pytest test_migrate_pc_to_monarch.py --cov=migrate_pc_to_mon
 
 import pytest
 import csv
+import io
 import os
-import tempfile
-import shutil
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List
-from unittest.mock import patch, mock_open
+from types import MappingProxyType
+from unittest.mock import patch
 
 # Import the functions we're testing
 import sys
-from pathlib import Path
 
 # Add root directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from migrate_pc_to_monarch import (
+    load_configuration,
     get_category_mappings,
     detect_pc_format,
     read_pc_transactions,
+    iter_pc_rows,
+    resolve_pc_columns,
     transform_transaction,
+    transform_pc_rows,
     track_category_remapping,
+    summarize_category_remapping,
     write_monarch_csv,
-    convert_pc_to_monarch
+    write_monarch_csv_to_stream,
+    convert_pc_to_monarch,
+    convert_pc_to_monarch_streams,
+    submit_conversion,
+    MONARCH_HEADERS,
+    MONARCH_HEADER_LINE
 )
 
+# Availability of the sample data files, checked once at collection time so
+# tests without their data are skipped before any setup runs
+TEST_DATA_DIR = Path(__file__).parent / 'test_data'
+SAMPLES = {
+    path: (TEST_DATA_DIR / path).is_file()
+    for path in (
+        'input/sample_format2.csv',
+        'input/edge_case_special_chars.csv',
+        'input/sample_with_tags.csv',
+        'input/edge_case_zero_amounts.csv',
+        'input/empty_file.csv',
+        'expected_output/sample_format2-monarch.csv',
+    )
+}
+
+
+def requires_samples(*paths):
+    """Skip a test unless all of the given test_data files exist."""
+    return pytest.mark.skipif(not all(SAMPLES[path] for path in paths),
+                              reason="Test data files not found")
+
 
 class TestCategoryMappings:
     """Test category mapping functionality."""
     
-    def test_get_category_mappings_returns_dict(self):
+    def test_get_category_mappings_returns_dict(self, category_mappings):
         """Test that get_category_mappings returns a dictionary."""
-        mappings = get_category_mappings()
-        assert isinstance(mappings, dict)
-        assert len(mappings) > 0
+        assert isinstance(category_mappings, dict)
+        assert len(category_mappings) > 0
     
-    def test_category_mappings_content(self):
+    # Mappings that appear in the user's test data
+    # Note: With case_sensitive_matching: false, keys are lowercase
+    @pytest.mark.parametrize("key, expected", [
+        ("gasoline/fuel", "Gas"),
+        ("transfers", "Transfer"),
+        ("credit card payments", "Credit Card Payment"),
+        ("travel", "Travel & Vacation"),
+        ("child", "Child Care"),  # Updated mapping in new config
+        ("entertainment", "Entertainment & Recreation"),
+        ("investment income", "Interest"),  # Updated mapping in new config
+        ("service charges/fees", "Financial Fees"),  # Updated mapping in new config
+        ("paychecks/salary", "Paychecks"),
+        ("atm/cash", "Cash & ATM"),
+    ])
+    def test_category_mapping_pair(self, category_mappings, key, expected):
         """Test specific category mappings from user's real data."""
-        mappings = get_category_mappings()
-        
-        # Test mappings that appear in the user's test data
-        # Note: With case_sensitive_matching: false, keys are lowercase
-        assert mappings["gasoline/fuel"] == "Gas"
-        assert mappings["transfers"] == "Transfer"
-        assert mappings["credit card payments"] == "Credit Card Payment"
-        assert mappings["travel"] == "Travel & Vacation"
-        assert mappings["child"] == "Child Care"  # Updated mapping in new config
-        assert mappings["entertainment"] == "Entertainment & Recreation"
-        assert mappings["investment income"] == "Interest"  # Updated mapping in new config
-        assert mappings["service charges/fees"] == "Financial Fees"  # Updated mapping in new config
-        assert mappings["paychecks/salary"] == "Paychecks"
-        assert mappings["atm/cash"] == "Cash & ATM"
-    
-    def test_category_mappings_no_duplicates(self):
-        """Test that all mapping keys are unique."""
-        mappings = get_category_mappings()
-        keys = list(mappings.keys())
-        assert len(keys) == len(set(keys))
+        assert category_mappings[key] == expected
+    
+    def test_get_category_mappings_is_memoized(self):
+        """Test that repeated calls reuse the loaded mappings."""
+        assert get_category_mappings() is get_category_mappings()
+    
+    def test_category_mappings_no_duplicates(self, raw_config):
+        """Test that no two config.yaml mapping keys differ only by case."""
+        source_categories = raw_config['category_mappings']
+        assert len(source_categories) == len({category.lower() for category in source_categories})
+
+
+class TestConfigurationCache:
+    """Test caching of parsed configuration files."""
+    
+    def test_unchanged_config_is_parsed_once(self, tmp_path):
+        """Test that an unchanged config file returns the cached configuration."""
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text("category_mappings:\n  Travel: Travel & Vacation\n")
+        
+        assert load_configuration(config_file) is load_configuration(config_file)
+        assert get_category_mappings(config_file) is get_category_mappings(config_file)
+    
+    def test_modified_config_is_reloaded(self, tmp_path):
+        """Test that editing the config file invalidates the cached mappings."""
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text("category_mappings:\n  Travel: Travel & Vacation\n")
+        assert get_category_mappings(config_file) == {'Travel': 'Travel & Vacation'}
+        
+        config_file.write_text("category_mappings:\n  Travel: Vacation\n  Child: Child Care\n")
+        assert get_category_mappings(config_file) == {'Travel': 'Vacation', 'Child': 'Child Care'}
+    
+    def test_sidecar_is_used_by_later_runs(self, tmp_path):
+        """Test that the JSON sidecar is written and reused without re-parsing YAML."""
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text("category_mappings:\n  Travel: Travel & Vacation\n")
+        
+        config = load_configuration(config_file)
+        assert (tmp_path / 'config.yaml.json').exists()
+        
+        # Simulate a fresh process: no in-memory cache, YAML parsing unavailable
+        with patch.dict('migrate_pc_to_monarch._CONFIG_CACHE', clear=True), \
+             patch('migrate_pc_to_monarch.yaml.load', side_effect=AssertionError("YAML re-parsed")):
+            assert load_configuration(config_file) == config
+    
+    def test_sidecar_ignores_same_size_edit_with_restored_mtime(self, tmp_path):
+        """Test that an edit keeping the file's size and mtime still invalidates the sidecar."""
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text("category_mappings:\n  Travel: Vacation A\n")
+        load_configuration(config_file)
+        original_stat = config_file.stat()
+        
+        # Same size, mtime put back as by cp -p or a checkout
+        config_file.write_text("category_mappings:\n  Travel: Vacation B\n")
+        os.utime(config_file, ns=(original_stat.st_atime_ns, original_stat.st_mtime_ns))
+        assert config_file.stat().st_size == original_stat.st_size
+        
+        with patch.dict('migrate_pc_to_monarch._CONFIG_CACHE', clear=True):
+            config = load_configuration(config_file)
+        assert config['category_mappings'] == {'Travel': 'Vacation B'}
+    
+    @pytest.mark.skipif(sys.platform == 'win32', reason="POSIX file permissions")
+    def test_sidecar_has_config_permissions(self, tmp_path):
+        """Test that the sidecar gets the YAML file's permissions, not 0600."""
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text("category_mappings:\n  Travel: Travel & Vacation\n")
+        config_file.chmod(0o640)
+        
+        load_configuration(config_file)
+        assert (tmp_path / 'config.yaml.json').stat().st_mode & 0o777 == 0o640
+    
+    def test_stale_sidecar_is_ignored(self, tmp_path):
+        """Test that a sidecar from an older config file is not used."""
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text("category_mappings:\n  Travel: Travel & Vacation\n")
+        load_configuration(config_file)
+        
+        config_file.write_text("category_mappings:\n  Travel: Vacation\n  Child: Child Care\n")
+        with patch.dict('migrate_pc_to_monarch._CONFIG_CACHE', clear=True):
+            config = load_configuration(config_file)
+        assert config['category_mappings'] == {'Travel': 'Vacation', 'Child': 'Child Care'}
 
 
 class TestFormatDetection:
@@ -104,96 +208,122 @@ class TestFormatDetection:
         assert result == 'format2'  # Default to format2
 
 
+# Personal Capital rows shared by tests. They are read-only views, since
+# transform_transaction must not modify its input.
+_EXPENSE_PC_ROW = MappingProxyType(
+    {'Date': '2024-01-15', 'Description': 'Store', 'Category': 'Shopping', 'Amount': '-50.00'})
+_INCOME_PC_ROW = MappingProxyType(
+    {'Date': '2024-01-15', 'Description': 'Salary', 'Category': 'Income', 'Amount': '2500.00'})
+_ZERO_PC_ROW = MappingProxyType(
+    {'Date': '2024-01-15', 'Description': 'Free', 'Category': 'Other', 'Amount': '0.00'})
+_BASIC_PC_ROW = MappingProxyType({
+    'Date': '2024-01-15',
+    'Description': 'Test Store',
+    'Category': 'Shopping',
+    'Tags': 'test',
+    'Amount': '-25.00'
+})
+_COMPLEX_PC_ROW = MappingProxyType({
+    'Date': '2024-01-15',
+    'Description': 'Complex Store Name & Co., LLC',
+    'Category': 'Gasoline/Fuel',
+    'Tags': 'business,quarterly,important',
+    'Amount': '-123.45'
+})
+_UNICODE_PC_ROW = MappingProxyType({
+    'Date': '2024-01-15',
+    'Description': 'Café München & Résidence',
+    'Category': 'Entertainment',
+    'Amount': '-15.50'
+})
+
+# Table of (case id, Personal Capital row, expected Monarch fields). Monarch
+# columns not listed in the expected fields must be empty.
+TRANSFORM_CASES = [
+    ("basic", MappingProxyType({
+        'Date': '2024-01-15',
+        'Description': 'Shell Gas Station',
+        'Category': 'Gasoline/Fuel',
+        'Tags': 'business,trip',
+        'Amount': '-45.00'
+    }), MappingProxyType({
+        'Date': '2024-01-15',
+        'Merchant': 'Shell Gas Station',
+        'Category': 'Gas',  # Mapped from 'Gasoline/Fuel'
+        'Original Statement': 'Shell Gas Station',
+        'Amount': '-45.00',
+        'Tags': 'business,trip',
+    })),
+    ("unmapped_category", MappingProxyType({
+        'Date': '2024-01-15',
+        'Description': 'Custom Store',
+        'Category': 'Unmapped Category',
+        'Tags': '',
+        'Amount': '-25.00'
+    }), MappingProxyType({
+        'Date': '2024-01-15',
+        'Merchant': 'Custom Store',
+        'Category': 'Unmapped Category',  # Unchanged
+        'Original Statement': 'Custom Store',
+        'Amount': '-25.00',
+    })),
+    ("action_field", MappingProxyType({
+        'Date': '2024-01-15',
+        'Description': 'AAPL Stock',
+        'Category': 'Stocks',
+        'Action': 'Buy',
+        'Amount': '-1000.00'
+    }), MappingProxyType({
+        'Date': '2024-01-15',
+        'Merchant': 'AAPL Stock',
+        'Category': 'Stocks',  # Unmapped since 'Stocks' not in updated config
+        'Original Statement': 'AAPL Stock',
+        'Notes': 'Buy',  # Action field mapped to Notes
+        'Amount': '-1000.00',
+    })),
+    ("missing_fields", MappingProxyType({
+        'Date': '2024-01-15',
+        'Description': 'Test Transaction',
+        'Amount': '-10.00'
+        # Missing Category, Tags, Action
+    }), MappingProxyType({
+        'Date': '2024-01-15',
+        'Merchant': 'Test Transaction',
+        'Original Statement': 'Test Transaction',
+        'Amount': '-10.00',
+    })),
+    ("special_characters", MappingProxyType({
+        'Date': '2024-01-15',
+        'Description': "McDonald's, Inc. & \"Big Store\"",
+        'Category': 'Entertainment',
+        'Amount': '-12.50'
+    }), MappingProxyType({
+        'Date': '2024-01-15',
+        'Merchant': "McDonald's, Inc. & \"Big Store\"",
+        'Category': 'Entertainment & Recreation',
+        'Original Statement': "McDonald's, Inc. & \"Big Store\"",
+        'Amount': '-12.50',
+    })),
+]
+
+# Column positions in Monarch CSV rows, for tests that read rows with csv.reader
+DATE, MERCHANT, CATEGORY, AMOUNT, TAGS = (
+    MONARCH_HEADERS.index(column) for column in ('Date', 'Merchant', 'Category', 'Amount', 'Tags'))
+
+# Every Monarch column, empty; Account is always left empty
+MONARCH_DEFAULTS = {header: '' for header in MONARCH_HEADERS}
+
+
 class TestTransactionTransformation:
     """Test individual transaction transformation logic."""
     
-    def test_transform_basic_transaction(self):
-        """Test transformation of a basic transaction."""
-        pc_row = {
-            'Date': '2024-01-15',
-            'Description': 'Shell Gas Station',
-            'Category': 'Gasoline/Fuel',
-            'Tags': 'business,trip',
-            'Amount': '-45.00'
-        }
-        mappings = get_category_mappings()
-        
-        result = transform_transaction(pc_row, mappings)
-        
-        assert result['Date'] == '2024-01-15'
-        assert result['Merchant'] == 'Shell Gas Station'
-        assert result['Category'] == 'Gas'  # Mapped from 'Gasoline/Fuel'
-        assert result['Account'] == ''  # Always empty
-        assert result['Original Statement'] == 'Shell Gas Station'
-        assert result['Notes'] == ''  # No Action field in format2
-        assert result['Amount'] == '-45.00'
-        assert result['Tags'] == 'business,trip'
-    
-    def test_transform_unmapped_category(self):
-        """Test transformation when category has no mapping."""
-        pc_row = {
-            'Date': '2024-01-15',
-            'Description': 'Custom Store',
-            'Category': 'Unmapped Category',
-            'Tags': '',
-            'Amount': '-25.00'
-        }
-        mappings = get_category_mappings()
-        
-        result = transform_transaction(pc_row, mappings)
-        
-        assert result['Category'] == 'Unmapped Category'  # Unchanged
-    
-    def test_transform_with_action_field(self):
-        """Test transformation with Action field (format1)."""
-        pc_row = {
-            'Date': '2024-01-15',
-            'Description': 'AAPL Stock',
-            'Category': 'Stocks',
-            'Action': 'Buy',
-            'Amount': '-1000.00'
-        }
-        mappings = get_category_mappings()
-        
-        result = transform_transaction(pc_row, mappings)
+    @pytest.mark.parametrize("name, pc_row, expected", TRANSFORM_CASES,
+                             ids=[case[0] for case in TRANSFORM_CASES])
+    def test_transform(self, category_mappings, name, pc_row, expected):
+        """Test transformation of a Personal Capital row to all 8 Monarch columns."""
+        result = transform_transaction(pc_row, category_mappings)
         
-        assert result['Category'] == 'Stocks'  # Unmapped since 'Stocks' not in updated config
-        assert result['Notes'] == 'Buy'  # Action field mapped to Notes
-    
-    def test_transform_missing_fields(self):
-        """Test transformation with missing optional fields."""
-        pc_row = {
-            'Date': '2024-01-15',
-            'Description': 'Test Transaction',
-            'Amount': '-10.00'
-            # Missing Category, Tags, Action
-        }
-        mappings = get_category_mappings()
-        
-        result = transform_transaction(pc_row, mappings)
-        
-        assert result['Date'] == '2024-01-15'
-        assert result['Merchant'] == 'Test Transaction'
-        assert result['Category'] == ''  # Missing category
-        assert result['Tags'] == ''  # Missing tags
-        assert result['Notes'] == ''  # Missing action
-        assert result['Amount'] == '-10.00'
-    
-    def test_transform_special_characters(self):
-        """Test transformation with special characters in description."""
-        pc_row = {
-            'Date': '2024-01-15',
-            'Description': "McDonald's, Inc. & \"Big Store\"",
-            'Category': 'Entertainment',
-            'Amount': '-12.50'
-        }
-        mappings = get_category_mappings()
-        
-        result = transform_transaction(pc_row, mappings)
-        
-        assert result['Merchant'] == "McDonald's, Inc. & \"Big Store\""
-        assert result['Original Statement'] == "McDonald's, Inc. & \"Big Store\""
-        assert result['Category'] == 'Entertainment & Recreation'
+        assert result == {**MONARCH_DEFAULTS, **expected}
 
 
 class TestCategoryRemappingTracking:
@@ -223,46 +353,52 @@ class TestCategoryRemappingTracking:
         track_category_remapping('Groceries', 'Groceries', remapping_counts)
         
         assert len(remapping_counts) == 0
+    
+    def test_summarize_category_remapping_matches_tracking(self, category_mappings):
+        """Test that bulk summarization agrees with per-transaction tracking."""
+        categories = ['Gasoline/Fuel', 'Groceries', 'Gasoline/Fuel', 'Transfers', 'Gasoline/Fuel']
+        
+        tracked = {}
+        for category in categories:
+            track_category_remapping(category, transform_transaction({'Category': category}, category_mappings)['Category'], tracked)
+        
+        summarized = summarize_category_remapping(Counter(categories), category_mappings)
+        
+        assert summarized == tracked
+        assert summarized['Gasoline/Fuel'] == {'mapped_to': 'Gas', 'count': 3}
+        assert 'Groceries' not in summarized
 
 
 class TestFileReading:
     """Test CSV file reading functionality."""
     
-    def test_read_pc_transactions_valid_file(self):
+    def test_read_pc_transactions_valid_file(self, tmp_path):
         """Test reading a valid Personal Capital CSV file."""
         test_content = """Date,Description,Category,Tags,Amount
 2024-01-15,Shell Gas Station,Gasoline/Fuel,business,-45.00
 2024-01-14,Starbucks,Entertainment,coffee,-5.75"""
         
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            f.write(test_content)
-            f.flush()
-            
-            try:
-                transactions, pc_format = read_pc_transactions(f.name)
-                
-                assert pc_format == 'format2'
-                assert len(transactions) == 2
-                assert transactions[0]['Description'] == 'Shell Gas Station'
-                assert transactions[1]['Description'] == 'Starbucks'
-            finally:
-                os.unlink(f.name)
-    
-    def test_read_pc_transactions_empty_file(self):
+        input_file = tmp_path / 'transactions.csv'
+        input_file.write_text(test_content)
+        
+        transactions, pc_format = read_pc_transactions(str(input_file))
+        
+        assert pc_format == 'format2'
+        assert len(transactions) == 2
+        assert transactions[0]['Description'] == 'Shell Gas Station'
+        assert transactions[1]['Description'] == 'Starbucks'
+    
+    def test_read_pc_transactions_empty_file(self, tmp_path):
         """Test reading an empty CSV file."""
         test_content = "Date,Description,Category,Tags,Amount\n"
         
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            f.write(test_content)
-            f.flush()
-            
-            try:
-                transactions, pc_format = read_pc_transactions(f.name)
-                
-                assert pc_format == 'format2'
-                assert len(transactions) == 0
-            finally:
-                os.unlink(f.name)
+        input_file = tmp_path / 'transactions.csv'
+        input_file.write_text(test_content)
+        
+        transactions, pc_format = read_pc_transactions(str(input_file))
+        
+        assert pc_format == 'format2'
+        assert len(transactions) == 0
     
     def test_read_pc_transactions_nonexistent_file(self):
         """Test reading a non-existent file raises FileNotFoundError."""
@@ -270,11 +406,62 @@ class TestFileReading:
             read_pc_transactions('nonexistent_file.csv')
 
 
+class TestPositionalRows:
+    """Test the positional (list-based) read and transform path."""
+    
+    def test_iter_pc_rows_normalizes_row_width(self):
+        """Test that short rows are padded, long rows trimmed and blank lines skipped."""
+        test_content = """Date,Description,Category,Tags,Amount
+2024-01-15,Store One,Shopping,tag1,-25.00
+
+2024-01-14,Store Two,Shopping
+2024-01-13,Store Three,Shopping,tag3,-5.00,extra"""
+        
+        reader = csv.reader(io.StringIO(test_content, newline=''))
+        headers = next(reader)
+        rows = list(iter_pc_rows(reader, len(headers)))
+        
+        assert headers == ['Date', 'Description', 'Category', 'Tags', 'Amount']
+        assert len(rows) == 3
+        assert rows[0] == ['2024-01-15', 'Store One', 'Shopping', 'tag1', '-25.00', '']
+        assert rows[1] == ['2024-01-14', 'Store Two', 'Shopping', '', '', '']
+        assert rows[2] == ['2024-01-13', 'Store Three', 'Shopping', 'tag3', '-5.00', '']
+    
+    def test_resolve_pc_columns_missing_columns(self):
+        """Test that absent columns resolve to the trailing padding field."""
+        headers = ['Date', 'Description', 'Category', 'Tags', 'Amount']
+        columns = resolve_pc_columns(headers)
+        
+        # Date, Description, Category, Action (missing), Amount, Tags
+        assert columns == (0, 1, 2, 5, 4, 3)
+    
+    def test_resolve_pc_columns_duplicated_header(self):
+        """Test that a duplicated column resolves to its last occurrence, like csv.DictReader."""
+        test_content = "Date,Description,Category,Amount,Amount\n2024-01-01,X,Travel,1,2\n"
+        
+        output = io.StringIO()
+        convert_pc_to_monarch_streams(io.StringIO(test_content, newline=''), output, category_mappings={})
+        output.seek(0)
+        
+        expected = next(csv.DictReader(io.StringIO(test_content, newline='')))
+        assert list(csv.reader(output))[1][AMOUNT] == expected['Amount'] == '2'
+    
+    def test_transform_pc_rows_matches_transform_transaction(self, category_mappings):
+        """Test that the positional transform agrees with transform_transaction."""
+        headers = ['Date', 'Description', 'Category', 'Action', 'Quantity', 'Price', 'Amount']
+        row = ['2024-01-15', 'AAPL Stock', 'Gasoline/Fuel', 'Buy', '1', '100', '-100.00', '']
+        
+        [result] = transform_pc_rows([row], resolve_pc_columns(headers), category_mappings, Counter())
+        expected = transform_transaction(dict(zip(headers, row)), category_mappings)
+        
+        assert result == tuple(expected[header] for header in MONARCH_HEADERS)
+
+
 class TestFileWriting:
     """Test CSV file writing functionality."""
     
     def test_write_monarch_csv_valid_data(self):
-        """Test writing valid transaction data to Monarch CSV."""
+        """Test writing valid transaction data as Monarch CSV."""
         transactions = [
             {
                 'Date': '2024-01-15',
@@ -288,189 +475,177 @@ class TestFileWriting:
             }
         ]
         
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            try:
-                write_monarch_csv(transactions, f.name)
-                
-                # Read back and verify
-                with open(f.name, 'r') as read_file:
-                    reader = csv.DictReader(read_file)
-                    rows = list(reader)
-                    
-                    assert len(rows) == 1
-                    assert rows[0]['Merchant'] == 'Shell Gas Station'
-                    assert rows[0]['Category'] == 'Gas'
-                    assert rows[0]['Amount'] == '-45.00'
-            finally:
-                os.unlink(f.name)
-    
-    def test_write_monarch_csv_empty_data(self):
+        buffer = io.StringIO()
+        write_monarch_csv_to_stream(transactions, buffer)
+        
+        # Read back and verify
+        buffer.seek(0)
+        rows = list(csv.DictReader(buffer))
+        
+        assert len(rows) == 1
+        assert rows[0]['Merchant'] == 'Shell Gas Station'
+        assert rows[0]['Category'] == 'Gas'
+        assert rows[0]['Amount'] == '-45.00'
+    
+    def test_write_monarch_csv_empty_data(self, tmp_path):
         """Test writing empty transaction data."""
         transactions = []
         
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            try:
-                write_monarch_csv(transactions, f.name)
-                
-                # Read back and verify headers exist
-                with open(f.name, 'r') as read_file:
-                    reader = csv.DictReader(read_file)
-                    rows = list(reader)
-                    
-                    assert len(rows) == 0
-                    # Check headers are correct
-                    expected_headers = ['Date', 'Merchant', 'Category', 'Account', 
-                                     'Original Statement', 'Notes', 'Amount', 'Tags']
-                    assert reader.fieldnames == expected_headers
-            finally:
-                os.unlink(f.name)
+        output_path = tmp_path / 'output.csv'
+        write_monarch_csv(transactions, str(output_path))
+        
+        # Read back and verify headers exist
+        with open(output_path, 'r') as read_file:
+            reader = csv.DictReader(read_file)
+            rows = list(reader)
+            
+            assert len(rows) == 0
+            # Check headers are correct
+            expected_headers = ['Date', 'Merchant', 'Category', 'Account', 
+                             'Original Statement', 'Notes', 'Amount', 'Tags']
+            assert reader.fieldnames == expected_headers
+    
+    def test_monarch_header_line_matches_csv_writer(self):
+        """Test that the precomputed header line is what csv.writer would write."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(MONARCH_HEADERS)
+        
+        assert MONARCH_HEADER_LINE == buffer.getvalue()
 
 
 class TestEndToEndConversion:
     """Test end-to-end file conversion using real test data."""
     
-    def test_convert_sample_format2(self):
+    pytestmark = pytest.mark.slow
+    
+    @requires_samples('input/sample_format2.csv', 'expected_output/sample_format2-monarch.csv')
+    def test_convert_sample_format2(self, sample_conversion, expected_format2_rows):
         """Test conversion of sample format2 file."""
-        input_file = 'tests/test_data/input/sample_format2.csv'
-        expected_file = 'tests/test_data/expected_output/sample_format2-monarch.csv'
-        
-        # Skip if test files don't exist
-        if not os.path.exists(input_file) or not os.path.exists(expected_file):
-            pytest.skip("Test data files not found")
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            try:
-                transaction_count, remapping_counts = convert_pc_to_monarch(input_file, f.name)
-                
-                # Verify transaction count
-                assert transaction_count == 10  # Based on sample_format2.csv
-                
-                # Verify some remappings occurred
-                assert 'Gasoline/Fuel' in remapping_counts
-                assert 'Transfers' in remapping_counts
-                assert 'Child' in remapping_counts  # This category should be remapped
-                
-                # Read generated file and compare with expected
-                with open(f.name, 'r') as generated, open(expected_file, 'r') as expected:
-                    generated_reader = csv.DictReader(generated)
-                    expected_reader = csv.DictReader(expected)
-                    
-                    generated_rows = list(generated_reader)
-                    expected_rows = list(expected_reader)
-                    
-                    assert len(generated_rows) == len(expected_rows)
-                    
-                    # Compare first row in detail
-                    if generated_rows:
-                        assert generated_rows[0]['Date'] == expected_rows[0]['Date']
-                        assert generated_rows[0]['Merchant'] == expected_rows[0]['Merchant']
-                        assert generated_rows[0]['Category'] == expected_rows[0]['Category']
-                        assert generated_rows[0]['Amount'] == expected_rows[0]['Amount']
-                        
-            finally:
-                os.unlink(f.name)
-    
-    def test_convert_special_characters(self):
+        transaction_count, remapping_counts, generated_rows = sample_conversion('sample_format2.csv')
+        
+        # Verify transaction count
+        assert transaction_count == 10  # Based on sample_format2.csv
+        
+        # Verify some remappings occurred
+        assert 'Gasoline/Fuel' in remapping_counts
+        assert 'Transfers' in remapping_counts
+        assert 'Child' in remapping_counts  # This category should be remapped
+        assert remapping_counts['Gasoline/Fuel'] == {'mapped_to': 'Gas', 'count': 4}
+        assert 'Parking' not in remapping_counts  # No mapping in config.yaml
+        
+        # Compare generated rows with expected
+        expected_rows = expected_format2_rows
+        assert len(generated_rows) == len(expected_rows)
+        
+        # Compare first row in detail
+        if generated_rows:
+            assert generated_rows[0][DATE] == expected_rows[0][DATE]
+            assert generated_rows[0][MERCHANT] == expected_rows[0][MERCHANT]
+            assert generated_rows[0][CATEGORY] == expected_rows[0][CATEGORY]
+            assert generated_rows[0][AMOUNT] == expected_rows[0][AMOUNT]
+    
+    @requires_samples('input/sample_format2.csv')
+    def test_convert_across_batches(self, test_input_bytes, category_mappings):
+        """Test that streaming in small batches gives the same result as one batch."""
+        input_text = test_input_bytes('sample_format2.csv').decode('utf-8')
+        
+        single_batch = io.StringIO()
+        expected = convert_pc_to_monarch_streams(
+            io.StringIO(input_text, newline=''), single_batch, category_mappings=category_mappings)
+        small_batches = io.StringIO()
+        with patch('migrate_pc_to_monarch.TRANSFORM_BATCH_SIZE', 3):
+            result = convert_pc_to_monarch_streams(
+                io.StringIO(input_text, newline=''), small_batches, category_mappings=category_mappings)
+        
+        assert result == expected
+        assert small_batches.getvalue() == single_batch.getvalue()
+    
+    @requires_samples('input/sample_format2.csv')
+    def test_convert_streams_matches_file_conversion(self, sample_conversion, tmp_path):
+        """Test that the file-based conversion writes the same rows as the stream core."""
+        transaction_count, remapping_counts, rows = sample_conversion('sample_format2.csv')
+        
+        output_path = tmp_path / 'output.csv'
+        result = convert_pc_to_monarch(str(TEST_DATA_DIR / 'input' / 'sample_format2.csv'), str(output_path))
+        
+        assert result == (transaction_count, remapping_counts)
+        with open(output_path, 'r', encoding='utf-8', newline='') as output_file:
+            assert list(csv.reader(output_file))[1:] == rows
+    
+    def test_convert_investment_format(self, capsys):
+        """Test that format1 is detected from the header and Action maps to Notes."""
+        test_content = """Date,Description,Category,Action,Quantity,Price,Amount
+2024-01-15,AAPL Stock,Investment Income,Buy,10,100.00,-1000.00
+2024-01-16,AAPL Stock,Investment Income,Sell,5,110.00,550.00"""
+        
+        output = io.StringIO()
+        transaction_count, remapping_counts = convert_pc_to_monarch_streams(
+            io.StringIO(test_content), output, source_name='brokerage.csv')
+        
+        assert "Detected format1 for brokerage.csv" in capsys.readouterr().out
+        assert transaction_count == 2
+        assert remapping_counts['Investment Income'] == {'mapped_to': 'Interest', 'count': 2}
+        
+        output.seek(0)
+        rows = list(csv.DictReader(output))
+        
+        assert [row['Notes'] for row in rows] == ['Buy', 'Sell']
+        assert [row['Tags'] for row in rows] == ['', '']  # No Tags column in format1
+    
+    @requires_samples('input/edge_case_special_chars.csv')
+    def test_convert_special_characters(self, sample_conversion):
         """Test conversion of file with special characters."""
-        input_file = 'tests/test_data/input/edge_case_special_chars.csv'
-        
-        if not os.path.exists(input_file):
-            pytest.skip("Test data file not found")
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            try:
-                transaction_count, remapping_counts = convert_pc_to_monarch(input_file, f.name)
-                
-                assert transaction_count == 5  # Based on edge_case_special_chars.csv
-                
-                # Read and verify special characters are preserved
-                with open(f.name, 'r', encoding='utf-8') as output_file:
-                    reader = csv.DictReader(output_file)
-                    rows = list(reader)
-                    
-                    # Check that special characters are preserved
-                    merchants = [row['Merchant'] for row in rows]
-                    assert any("McDonald's" in merchant for merchant in merchants)
-                    assert any("Café Délicieux" in merchant for merchant in merchants)
-                    assert any("Big Box Store" in merchant for merchant in merchants)
-                    
-            finally:
-                os.unlink(f.name)
-    
-    def test_convert_with_tags(self):
+        transaction_count, remapping_counts, rows = sample_conversion('edge_case_special_chars.csv')
+        
+        assert transaction_count == 5  # Based on edge_case_special_chars.csv
+        
+        # Check that special characters are preserved
+        merchants = [row[MERCHANT] for row in rows]
+        assert any("McDonald's" in merchant for merchant in merchants)
+        assert any("Café Délicieux" in merchant for merchant in merchants)
+        assert any("Big Box Store" in merchant for merchant in merchants)
+    
+    @requires_samples('input/sample_with_tags.csv')
+    def test_convert_with_tags(self, sample_conversion):
         """Test conversion preserves tags correctly."""
-        input_file = 'tests/test_data/input/sample_with_tags.csv'
-        
-        if not os.path.exists(input_file):
-            pytest.skip("Test data file not found")
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            try:
-                transaction_count, remapping_counts = convert_pc_to_monarch(input_file, f.name)
-                
-                # Read and verify tags are preserved
-                with open(f.name, 'r') as output_file:
-                    reader = csv.DictReader(output_file)
-                    rows = list(reader)
-                    
-                    # Find row with tags and verify they're preserved
-                    tagged_rows = [row for row in rows if row['Tags']]
-                    assert len(tagged_rows) > 0
-                    
-                    # Check specific tag preservation
-                    assert any("organic,weekly" in row['Tags'] for row in tagged_rows)
-                    assert any("business,trip" in row['Tags'] for row in tagged_rows)
-                    
-            finally:
-                os.unlink(f.name)
-    
-    def test_convert_zero_amounts(self):
+        transaction_count, remapping_counts, rows = sample_conversion('sample_with_tags.csv')
+        
+        # Find row with tags and verify they're preserved
+        tagged_rows = [row for row in rows if row[TAGS]]
+        assert len(tagged_rows) > 0
+        
+        # Check specific tag preservation
+        assert any("organic,weekly" in row[TAGS] for row in tagged_rows)
+        assert any("business,trip" in row[TAGS] for row in tagged_rows)
+    
+    @requires_samples('input/edge_case_zero_amounts.csv')
+    def test_convert_zero_amounts(self, sample_conversion):
         """Test conversion handles zero and small amounts correctly."""
-        input_file = 'tests/test_data/input/edge_case_zero_amounts.csv'
-        
-        if not os.path.exists(input_file):
-            pytest.skip("Test data file not found")
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            try:
-                transaction_count, remapping_counts = convert_pc_to_monarch(input_file, f.name)
-                
-                # Read and verify amounts are preserved exactly
-                with open(f.name, 'r') as output_file:
-                    reader = csv.DictReader(output_file)
-                    rows = list(reader)
-                    
-                    amounts = [row['Amount'] for row in rows]
-                    assert '0.00' in amounts
-                    assert '0.01' in amounts
-                    assert '-0.50' in amounts
-                    
-            finally:
-                os.unlink(f.name)
-    
-    def test_convert_empty_file(self):
+        transaction_count, remapping_counts, rows = sample_conversion('edge_case_zero_amounts.csv')
+        
+        # Verify amounts are preserved exactly
+        amounts = [row[AMOUNT] for row in rows]
+        assert '0.00' in amounts
+        assert '0.01' in amounts
+        assert '-0.50' in amounts
+    
+    @requires_samples('input/empty_file.csv')
+    def test_convert_empty_file(self, tmp_path):
         """Test conversion of empty CSV file."""
-        input_file = 'tests/test_data/input/empty_file.csv'
-        
-        if not os.path.exists(input_file):
-            pytest.skip("Test data file not found")
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            try:
-                transaction_count, remapping_counts = convert_pc_to_monarch(input_file, f.name)
-                
-                assert transaction_count == 0
-                assert len(remapping_counts) == 0
-                
-                # Verify file has correct headers
-                with open(f.name, 'r') as output_file:
-                    reader = csv.DictReader(output_file)
-                    expected_headers = ['Date', 'Merchant', 'Category', 'Account', 
-                                     'Original Statement', 'Notes', 'Amount', 'Tags']
-                    assert reader.fieldnames == expected_headers
-                    
-            finally:
-                os.unlink(f.name)
+        input_file = str(TEST_DATA_DIR / 'input' / 'empty_file.csv')
+        
+        output_path = tmp_path / 'output.csv'
+        transaction_count, remapping_counts = convert_pc_to_monarch(input_file, str(output_path))
+        
+        assert transaction_count == 0
+        assert len(remapping_counts) == 0
+        
+        # Verify file has correct headers
+        with open(output_path, 'r') as output_file:
+            reader = csv.DictReader(output_file)
+            expected_headers = ['Date', 'Merchant', 'Category', 'Account', 
+                             'Original Statement', 'Notes', 'Amount', 'Tags']
+            assert reader.fieldnames == expected_headers
 
 
 class TestDataIntegrity:
@@ -479,36 +654,24 @@ class TestDataIntegrity:
     def test_amount_sign_preservation(self):
         """Test that amount signs are preserved correctly."""
         # Negative amount (expense)
-        pc_row = {'Date': '2024-01-15', 'Description': 'Store', 'Category': 'Shopping', 'Amount': '-50.00'}
-        result = transform_transaction(pc_row, {})
+        result = transform_transaction(_EXPENSE_PC_ROW, {})
         assert result['Amount'] == '-50.00'
         
         # Positive amount (income)
-        pc_row = {'Date': '2024-01-15', 'Description': 'Salary', 'Category': 'Income', 'Amount': '2500.00'}
-        result = transform_transaction(pc_row, {})
+        result = transform_transaction(_INCOME_PC_ROW, {})
         assert result['Amount'] == '2500.00'
         
         # Zero amount
-        pc_row = {'Date': '2024-01-15', 'Description': 'Free', 'Category': 'Other', 'Amount': '0.00'}
-        result = transform_transaction(pc_row, {})
+        result = transform_transaction(_ZERO_PC_ROW, {})
         assert result['Amount'] == '0.00'
     
     def test_monarch_format_compliance(self):
         """Test that output strictly follows Monarch's 8-column format."""
-        pc_row = {
-            'Date': '2024-01-15',
-            'Description': 'Test Store',
-            'Category': 'Shopping',
-            'Tags': 'test',
-            'Amount': '-25.00'
-        }
-        result = transform_transaction(pc_row, {})
+        result = transform_transaction(_BASIC_PC_ROW, {})
         
-        # Verify all 8 required Monarch columns are present
-        expected_columns = ['Date', 'Merchant', 'Category', 'Account', 
-                          'Original Statement', 'Notes', 'Amount', 'Tags']
-        
-        assert set(result.keys()) == set(expected_columns)
+        # Verify all 8 required Monarch columns are present, in Monarch's column order
+        assert tuple(result.keys()) == ('Date', 'Merchant', 'Category', 'Account',
+                                        'Original Statement', 'Notes', 'Amount', 'Tags')
         
         # Verify Account is empty (for manual assignment in Monarch)
         assert result['Account'] == ''
@@ -517,18 +680,11 @@ class TestDataIntegrity:
         assert result['Merchant'] == 'Test Store'
         assert result['Original Statement'] == 'Test Store'
     
-    def test_no_data_loss(self):
+    def test_no_data_loss(self, category_mappings):
         """Test that no data is lost during conversion."""
-        original_data = {
-            'Date': '2024-01-15',
-            'Description': 'Complex Store Name & Co., LLC',
-            'Category': 'Gasoline/Fuel',
-            'Tags': 'business,quarterly,important',
-            'Amount': '-123.45'
-        }
+        original_data = _COMPLEX_PC_ROW
         
-        mappings = get_category_mappings()
-        result = transform_transaction(original_data, mappings)
+        result = transform_transaction(original_data, category_mappings)
         
         # Verify all original data is preserved or properly mapped
         assert result['Date'] == original_data['Date']
@@ -537,8 +693,16 @@ class TestDataIntegrity:
         assert result['Tags'] == original_data['Tags']
         assert result['Amount'] == original_data['Amount']
         # Test that category was properly mapped (using same logic as transform_transaction)
-        expected_category = mappings.get(original_data['Category']) or mappings.get(original_data['Category'].lower(), original_data['Category'])
+        expected_category = category_mappings.get(original_data['Category']) or category_mappings.get(original_data['Category'].lower(), original_data['Category'])
         assert result['Category'] == expected_category
+    
+    def test_transform_is_pure(self, category_mappings):
+        """Test that repeated transforms of one row give equal, independent results."""
+        first = transform_transaction(_COMPLEX_PC_ROW, category_mappings)
+        second = transform_transaction(_COMPLEX_PC_ROW, category_mappings)
+        
+        assert first == second
+        assert first is not second
 
 
 class TestErrorHandling:
@@ -551,29 +715,60 @@ class TestErrorHandling:
 2024-01-15,Store One,Shopping,tag1,-25.00
 2024-01-14,Store Two,Shopping  # Missing amount column"""
         
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            f.write(malformed_content)
-            f.flush()
-            
-            try:
-                # This should not crash, but handle gracefully
-                transactions, pc_format = read_pc_transactions(f.name)
-                # The CSV reader should still work, just with missing fields
-                assert pc_format == 'format2'
-                assert len(transactions) >= 1  # At least the valid row
-            finally:
-                os.unlink(f.name)
+        # This should not crash, but handle gracefully
+        transactions, pc_format = read_pc_transactions(io.StringIO(malformed_content))
+        # The CSV reader should still work, just with missing fields
+        assert pc_format == 'format2'
+        assert len(transactions) >= 1  # At least the valid row
+    
+    def test_inline_conversion_failure_is_reported_through_future(self, tmp_path):
+        """Test that an in-process conversion error surfaces via the returned future."""
+        output_file = tmp_path / 'out.csv'
+        future = submit_conversion(None, 'nonexistent_file.csv', str(output_file), {})
+        
+        assert future.done()
+        with pytest.raises(FileNotFoundError):
+            future.result()
+        assert not output_file.exists()
+    
+    def test_output_error_is_reported_as_write_error(self, tmp_path):
+        """Test that failing to create the output file is reported against the output path."""
+        input_file = tmp_path / 'transactions.csv'
+        input_file.write_text("Date,Description,Category,Tags,Amount\n")
+        output_file = tmp_path / 'missing' / 'transactions-monarch.csv'
+        
+        with pytest.raises(IOError, match="Unable to write output file"):
+            convert_pc_to_monarch(str(input_file), str(output_file), category_mappings={})
+    
+    def test_input_read_error_is_not_reported_as_write_error(self, tmp_path):
+        """Test that an OSError while reading the input propagates unchanged."""
+        input_file = tmp_path / 'transactions.csv'
+        input_file.write_text("Date,Description,Category,Tags,Amount\n2024-01-15,Store,Gas,,-5.00\n")
+        
+        with patch('migrate_pc_to_monarch.iter_pc_rows', side_effect=OSError("Input/output error")), \
+             pytest.raises(OSError, match="^Input/output error$"):
+            convert_pc_to_monarch(str(input_file), str(tmp_path / 'out.csv'), category_mappings={})
+    
+    def test_failed_conversion_keeps_previous_output(self, tmp_path):
+        """Test that a failed rerun leaves the earlier output file untouched."""
+        input_file = tmp_path / 'transactions.csv'
+        output_file = tmp_path / 'transactions-monarch.csv'
+        input_file.write_bytes(b"Date,Description,Category,Tags,Amount\n2024-01-15,Store,Gas,,-5.00\n")
+        convert_pc_to_monarch(str(input_file), str(output_file), category_mappings={})
+        previous_output = output_file.read_bytes()
+        
+        # Invalid UTF-8 fails the conversion part-way through reading the input
+        input_file.write_bytes(b"Date,Description,Category,Tags,Amount\n2024-01-15,\xff,Gas,,-5.00\n")
+        with pytest.raises(UnicodeDecodeError):
+            convert_pc_to_monarch(str(input_file), str(output_file), category_mappings={})
+        
+        assert output_file.read_bytes() == previous_output
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            'transactions-monarch.csv', 'transactions.csv']
     
     def test_unicode_handling(self):
         """Test handling of Unicode characters."""
-        pc_row = {
-            'Date': '2024-01-15',
-            'Description': 'Café München & Résidence',
-            'Category': 'Entertainment',
-            'Amount': '-15.50'
-        }
-        
-        result = transform_transaction(pc_row, {})
+        result = transform_transaction(_UNICODE_PC_ROW, {})
         
         # Unicode characters should be preserved
         assert result['Merchant'] == 'Café München & Résidence'